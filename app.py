@@ -1,10 +1,15 @@
+import importlib
+
 import streamlit as st
-import pandas as pd
-import networkx as nx
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import armazem
+import medicao
+import regioes
 
 st.set_page_config(
     layout="wide",
-    page_title="Análise da Rede Aérea Brasileira",
+    page_title="Análise da Rede Aérea",
 )
 
 st.markdown("""
@@ -133,71 +138,80 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-st.title("Análise Rede Aérea Brasileira")
-
-@st.cache_data
-def load_data():
-    airports = pd.read_csv("airports.dat", header=None)
-    routes = pd.read_csv("routes.dat", header=None)
-    airports.columns = ["Airport ID","Name","City","Country","IATA","ICAO","Latitude","Longitude","Altitude","Timezone","DST","Database Timezone","Type","Source"]
-    routes.columns = ["Airline","Airline ID","Source airport","Source airport ID","Destination airport","Destination airport ID","Codeshare","Stops","Equipment"]
-    return airports, routes
-
-airports, routes = load_data()
-
-airports_br = airports[airports['Country'] == 'Brazil'].copy()
-airport_ids_br = set(airports_br["Airport ID"])
-
-# Check data types and clean the data
-routes = routes.dropna(subset=["Source airport ID", "Destination airport ID"])
-routes["Source airport ID"] = pd.to_numeric(routes["Source airport ID"], errors='coerce')
-routes["Destination airport ID"] = pd.to_numeric(routes["Destination airport ID"], errors='coerce')
-routes = routes.dropna(subset=["Source airport ID", "Destination airport ID"])
-
-# Convert to int after cleaning
-routes["Source airport ID"] = routes["Source airport ID"].astype(int)
-routes["Destination airport ID"] = routes["Destination airport ID"].astype(int)
-
-routes_br = routes[routes["Source airport ID"].isin(airport_ids_br) &
-                   routes["Destination airport ID"].isin(airport_ids_br)].copy()
-
-G_br = nx.DiGraph()
-
-for _, row in airports_br.iterrows():
-    G_br.add_node(int(row["Airport ID"]), **row.to_dict())
-
-for _, row in routes_br.iterrows():
-    G_br.add_edge(int(row["Source airport ID"]), int(row["Destination airport ID"]))
-
-st.session_state.airports_br = airports_br
-st.session_state.routes_br = routes_br
-st.session_state.G_br = G_br
-
-# Enhanced page selection with descriptions
-page_options = {
-    "Mapa de Rotas Interativo",
-    "Dashboard de Grau", 
-    "Centralidade",
-    "Caminho Mais Curto",
-    "Comunidades e Clusters",
-    "Robustez da Rede"
+# Per-stage timings of this rerun, for the sidebar panel (checkbox at the bottom of the
+# sidebar) and the JSON-lines log; with MEDICAO=1 every rerun is instrumented
+show_timings = st.session_state.get('show_timings', medicao.enabled_by_env())
+if show_timings or medicao.enabled_by_env():
+    script_ctx = get_script_run_ctx()
+    medicao.start_run(session=script_ctx.session_id if script_ctx else None)
+
+# Tables and graphs live in a process-wide store shared by every session; the session
+# itself only keeps the user's selections
+with medicao.stage("app.dataset"):
+    data = armazem.dataset()
+
+# Region selection: no country selected means the whole world
+selected_countries = st.sidebar.multiselect(
+    "Países:",
+    data.countries,
+    default=list(regioes.DEFAULT_COUNTRIES),
+    help="Deixe vazio para analisar a rede mundial"
+)
+region = regioes.region_key(selected_countries)
+
+# Selections made on another region refer to airports that are no longer in the graph
+if st.session_state.get('region') != region:
+    st.session_state.region = region
+    st.session_state.selected_airports = []
+    st.session_state.removed_nodes = set()
+
+with medicao.stage("app.region"):
+    view = armazem.region(region)
+
+st.title(f"Análise Rede Aérea ({view.name})")
+
+# Page name -> module with a render() entry point. A page module (and the plotting
+# libraries it uses) is only imported the first time the page is selected.
+page_modules = {
+    "Mapa de Rotas Interativo": "mapa_rotas",
+    "Dashboard de Grau": "histograma_grau",
+    "Centralidade": "centralidade",
+    "Caminho Mais Curto": "caminho_curto",
+    "Comunidades e Clusters": "comunidades",
+    "Robustez da Rede": "robustez"
 }
 
 page = st.selectbox(
     "Selecione a visualização:",
-    page_options,
+    list(page_modules),
     format_func=lambda x: f"{x}"
 )
 
-if page == "Mapa de Rotas Interativo":
-    exec(open("mapa_rotas.py").read())
-elif page == "Dashboard de Grau":
-    exec(open("histograma_grau.py").read())
-elif page == "Centralidade":
-    exec(open("centralidade.py").read())
-elif page == "Caminho Mais Curto":
-    exec(open("caminho_curto.py").read())
-elif page == "Comunidades e Clusters":
-    exec(open("comunidades.py").read())
-elif page == "Robustez da Rede":
-    exec(open("robustez.py").read())
+run = medicao.current()
+if run is not None:
+    run.context.update(region=region, page=page_modules[page], airports=len(view.graph))
+try:
+    with medicao.stage(f"{page_modules[page]}.render"):
+        importlib.import_module(page_modules[page]).render(view)
+finally:
+    run = medicao.finish_run()
+
+st.sidebar.checkbox("Mostrar tempos por etapa", value=medicao.enabled_by_env(), key='show_timings')
+if run is not None and show_timings:
+    with st.sidebar.expander("Tempos por etapa", expanded=True):
+        st.dataframe(
+            [
+                {'Etapa': "\u2003" * depth + name, 'ms': round(seconds * 1000, 1)}
+                for name, seconds, depth in run.stages
+            ],
+            hide_index=True
+        )
+        st.caption(f"Total: {run.total * 1000:,.0f} ms")
+        if run.counters:
+            st.dataframe(
+                [{'Contador': name, 'Valor': value} for name, value in sorted(run.counters.items())],
+                hide_index=True
+            )
+        # Memory held by this session on top of the shared store; walking the whole
+        # session state is not free, so it is only measured while the panel is open
+        st.caption(f"Memória da sessão: {armazem.session_bytes(st.session_state.to_dict()) / 1024:,.0f} KB")
@@ -0,0 +1,171 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import conectividade
+import dados
+import grafo
+import medicao
+import regioes
+import resultados
+
+# Region views kept besides the world graph; the least recently used is dropped past this
+MAX_REGIONS = 8
+# Built figures kept across reruns and sessions; least recently used dropped past this size
+MAX_FIGURE_BYTES = 256 * 2**20
+
+_lock = threading.Lock()
+_dataset = None
+_regions = OrderedDict()
+_connectivity = OrderedDict()
+_figures = OrderedDict()
+_figure_bytes = 0
+
+
+# Route tables and world graph of one dataset version. Shared by every session of the
+# process, so it must be treated as read-only: pages copy before changing a frame.
+class Dataset:
+    def __init__(self, version, airports, routes):
+        self.version = version
+        self.airports = airports
+        self.routes = routes
+        self.world = grafo.build_graph(airports, routes)
+        self.countries = sorted(airports['Country'].dropna().unique())
+
+
+# Airports, routes and graph of the countries in `key` (see regioes.region_key), plus its
+# display name and map view. Read-only and shared like Dataset.
+class RegionView:
+    def __init__(self, dataset, key):
+        self.dataset = dataset
+        self.key = key
+        self.name = regioes.region_name(key)
+        self.geo_view = regioes.geo_view(key)
+        self.graph = dataset.world.subgraph(regioes.node_mask(dataset.airports, key))
+        self.G = self.graph.G
+        self.airports = self.graph.airports
+        self.routes = dataset.routes[self.graph.route_mask()]
+
+
+# The current dataset, reloaded (and the region views dropped) when the source files change
+def dataset(base_dir="."):
+    global _dataset
+    version = dados.dataset_version(base_dir)
+    with _lock:
+        if _dataset is None or _dataset.version != version:
+            airports, routes = dados.load_tables(base_dir)
+            _dataset = Dataset(version, airports, routes)
+            _regions.clear()
+            _connectivity.clear()
+            _clear_figures()
+            resultados.clear()
+        return _dataset
+
+
+def region(key, base_dir="."):
+    data = dataset(base_dir)
+    with _lock:
+        view = _regions.get(key)
+        if view is None or view.dataset is not data:
+            view = _regions[key] = RegionView(data, key)
+            while len(_regions) > MAX_REGIONS:
+                _regions.popitem(last=False)
+        _regions.move_to_end(key)
+        return view
+
+
+# Robustness state of a graph with nothing removed, built once per graph fingerprint and
+# shared by every session; sessions keep only their removed airports and work on
+# state.with_removed(...), never on this object
+def connectivity(graph):
+    with _lock:
+        state = _connectivity.get(graph.fingerprint)
+        if state is not None and state.graph is graph:
+            _connectivity.move_to_end(graph.fingerprint)
+            medicao.count("armazem.connectivity.stored")
+            return state
+    medicao.count("armazem.connectivity.built")
+    state = conectividade.ConnectivityState(graph)
+    with _lock:
+        _connectivity[graph.fingerprint] = state
+        while len(_connectivity) > MAX_REGIONS + 1:
+            _connectivity.popitem(last=False)
+    return state
+
+
+def _clear_figures():
+    global _figure_bytes
+    _figures.clear()
+    _figure_bytes = 0
+
+
+# A built figure (plotly Figure, or rendered image bytes) for `key`, which must hold
+# everything the figure depends on (page, graph fingerprint, control values); build() runs
+# only when the figure is not stored. Stored figures are shared by every session, so they
+# must not be changed after build() returns.
+def figure(key, build):
+    global _figure_bytes
+    with _lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            medicao.count("armazem.figure.stored")
+            return _figures[key][0]
+    medicao.count("armazem.figure.built")
+    value = build()
+    size = len(value) if isinstance(value, bytes) else deep_bytes(value.to_dict())
+    with _lock:
+        if key not in _figures and size <= MAX_FIGURE_BYTES:
+            _figures[key] = (value, size)
+            _figure_bytes += size
+            while _figure_bytes > MAX_FIGURE_BYTES:
+                _, (_, dropped) = _figures.popitem(last=False)
+                _figure_bytes -= dropped
+    return value
+
+
+# Bytes held by `obj` and everything it references, skipping the objects where
+# skip(obj) is true
+def deep_bytes(obj, skip=lambda obj: False):
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or skip(obj):
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, np.ndarray):
+            total += obj.nbytes if obj.base is None else sys.getsizeof(obj)
+        elif isinstance(obj, (pd.DataFrame, pd.Series)):
+            total += int(np.sum(obj.memory_usage(deep=True)))
+        else:
+            total += sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                stack.extend(obj)
+            elif hasattr(obj, '__dict__'):
+                stack.append(vars(obj))
+    return total
+
+
+# Bytes held by a session's state, not counting anything owned by the shared store. Shared
+# objects are recognised by identity, so a graph a session still holds after the store
+# dropped it is counted against the session.
+def session_bytes(state):
+    with _lock:
+        shared = [*_regions.values(), *_connectivity.values()]
+        if _dataset is not None:
+            shared += [_dataset, _dataset.world]
+    owned = set()
+    for obj in shared:
+        owned.add(id(obj))
+        for name in ('graph', 'G', 'airports', 'routes'):
+            # vars(): never build a lazy attribute just to skip it
+            if name in vars(obj):
+                owned.add(id(vars(obj)[name]))
+    return deep_bytes(state, lambda obj: id(obj) in owned)
@@ -0,0 +1,70 @@
+"""Latency of nearest-airport and radius queries on the world airport set.
+
+Queries are placed a few km from random airports (where clicks and typed coordinates
+land) and, separately, uniformly over the globe; a numpy haversine scan over every
+airport is timed as the reference.
+
+Run from the repository root:
+
+    python benchmarks/espacial.py --queries 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dados  # noqa: E402
+import espacial  # noqa: E402
+import geo  # noqa: E402
+
+
+def _summary(label, times):
+    us = np.array(times) * 1e6
+    print(f"{label:<28} n={len(us):<5} mediana={np.median(us):8.1f} µs  "
+          f"p95={np.percentile(us, 95):8.1f} µs  máx={us.max():8.1f} µs")
+
+
+def _time(function, queries):
+    times = []
+    for lat, lon in queries:
+        start = time.perf_counter()
+        function(lat, lon)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--radius", type=float, default=200.0, help="km")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    airports, _ = dados.load_tables()
+    start = time.perf_counter()
+    index = espacial.SpatialIndex(airports)
+    print(f"índice: {len(index)} aeroportos ({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+    rng = np.random.default_rng(args.seed)
+    lat = airports['Latitude'].to_numpy(dtype=float)
+    lon = airports['Longitude'].to_numpy(dtype=float)
+    picks = rng.choice(len(airports), args.queries)
+    near = list(zip((lat[picks] + rng.normal(0, 0.05, args.queries)).clip(-90, 90).tolist(),
+                    ((lon[picks] + rng.normal(0, 0.05, args.queries) + 180) % 360 - 180).tolist()))
+    uniform = list(zip(np.degrees(np.arcsin(rng.uniform(-1, 1, args.queries))).tolist(),
+                       rng.uniform(-180, 180, args.queries).tolist()))
+
+    for label, queries in (("perto de aeroportos", near), ("uniforme no globo", uniform)):
+        print(label)
+        _summary("  mais próximo", _time(index.nearest, queries))
+        _summary("  10 mais próximos", _time(lambda a, o: index.nearest(a, o, 10), queries))
+        _summary(f"  raio {args.radius:g} km", _time(lambda a, o: index.within(a, o, args.radius), queries))
+        _summary("  varredura numpy", _time(lambda a, o: np.argmin(geo.haversine_km(a, o, lat, lon)), queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Time and peak memory of each pipeline stage at several dataset scales.
+
+Every stage is first run `--warmup` times untimed (lazy imports such as plotly's, first
+touches of cached properties and cold caches otherwise land in the first timing), then
+timed `--repeat` times (best and median kept) and run once more under tracemalloc for its
+peak allocation, so the memory pass does not slow the timings. The figure stages call
+the pages' own builders (mapa_rotas.build_figure, centralidade.build_figure,
+caminho_curto.build_figure, comunidades.build_map/build_matrix, robustez.build_map) and serialize the result as
+st.plotly_chart does. Results go to a JSON file; with --baseline, each stage is compared
+with a previous run and the script exits with status 1 when any stage got slower than
+--tolerance (and by more than --min-seconds).
+
+Run from the repository root:
+
+    python benchmarks/etapas.py --output benchmarks/resultado.json
+    python benchmarks/etapas.py --scales brasil mundo --baseline benchmarks/resultado.json
+
+Scales: brasil, america_do_sul and mundo use airports.dat/routes.dat; sintetico_10x
+and sintetico_100x are networks 10 and 100 times the world's from sintetico.py,
+loaded the same way from a temporary directory. Stages whose cost grows too fast for a scale are recorded as skipped.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import armazem  # noqa: E402
+import busca  # noqa: E402
+import caminho_curto  # noqa: E402
+import centralidade  # noqa: E402
+import comunidades  # noqa: E402
+import conectividade  # noqa: E402
+import dados  # noqa: E402
+import distancias  # noqa: E402
+import esparsa  # noqa: E402
+import estatisticas  # noqa: E402
+import grafo  # noqa: E402
+import intermediacao  # noqa: E402
+import mapa_rotas  # noqa: E402
+import particoes  # noqa: E402
+import percolacao  # noqa: E402
+import regioes  # noqa: E402
+import robustez  # noqa: E402
+import sintetico  # noqa: E402
+
+SOUTH_AMERICA = (
+    "Argentina", "Bolivia", "Brazil", "Chile", "Colombia", "Ecuador", "Falkland Islands",
+    "French Guiana", "Guyana", "Paraguay", "Peru", "Suriname", "Uruguay", "Venezuela",
+)
+SCALES = {
+    "brasil": {"countries": ("Brazil",)},
+    "america_do_sul": {"countries": SOUTH_AMERICA},
+    "mundo": {"countries": ()},
+    "sintetico_10x": {"countries": (), "factor": 10},
+    "sintetico_100x": {"countries": (), "factor": 100},
+}
+PATH_QUERIES = 20
+
+
+def _parse(ctx):
+    base_dir = ctx['base_dir']
+    dados._parse_airports(os.path.join(base_dir, dados.AIRPORTS_FILE))
+    dados._parse_routes(os.path.join(base_dir, dados.ROUTES_FILE))
+
+
+def _load_data(ctx):
+    ctx['airports'], ctx['routes'] = dados.load_tables(ctx['base_dir'])
+
+
+def _graph_build(ctx):
+    # Same as the app's shared store: the dataset's world graph, then the region view
+    dataset = armazem.Dataset(None, ctx['airports'], ctx['routes'])
+    ctx['view'] = armazem.RegionView(dataset, regioes.region_key(ctx['countries']))
+    ctx['graph'] = ctx['view'].graph
+
+
+def _degree_table(ctx):
+    graph = ctx['graph']
+    node_degrees = dict(graph.G.degree())
+    table = graph.node_table(node_degrees.keys(), ['IATA', 'Name', 'City'])
+    table['Degree'] = table['Airport_ID'].map(node_degrees)
+
+
+# A centrality stage, keeping the result for the centrality figure
+def _centrality(name, function):
+    def stage(ctx):
+        ctx.setdefault('centrality', {})[name] = function(ctx['graph'])
+    return stage
+
+
+def _louvain(ctx):
+    ctx['louvain'] = particoes._louvain(ctx['graph'], 1, particoes.SEED)
+
+
+def _query_pairs(graph):
+    rng = np.random.default_rng(0)
+    candidates = graph.node_ids[np.diff(graph.indptr) > 0]
+    return [tuple(rng.choice(candidates, 2, replace=False).tolist()) for _ in range(PATH_QUERIES)]
+
+
+# The all-pairs store the shortest-path page opens, built from scratch in a temporary
+# directory on every call
+def _hop_distances(ctx):
+    tmp_dir = tempfile.mkdtemp(prefix="distancias-")
+    try:
+        ctx['hop_distances'] = distancias.hop_distances(ctx['graph'], base_dir=tmp_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# Path queries as the page answers them: from the hop store when it was built for this
+# scale, and by great-circle distance
+def _shortest_path(ctx):
+    graph = ctx['graph']
+    store = ctx.get('hop_distances')
+    found = []
+    for src_id, dst_id in _query_pairs(graph):
+        path, _ = busca.astar_path(graph, src_id, dst_id)
+        if store is not None:
+            store.path(src_id, dst_id)
+        if path:
+            found.append(((src_id, dst_id), path))
+    ctx['path_pair'], ctx['path'] = found[0] if found else (None, None)
+
+
+def _robustness(ctx):
+    graph = ctx['graph']
+    # The shared intact state, then the page's per-rerun copy with the removals applied
+    base = conectividade.ConnectivityState(graph)
+    degree = np.diff(graph.indptr) + np.bincount(graph.dst, minlength=len(graph))
+    removed = set(graph.node_ids[np.argsort(-degree, kind='stable')[:10]].tolist())
+    state = base.with_removed(removed)
+    state.metrics()
+    ctx['robustness'] = (state, removed)
+
+
+def _percolation(ctx):
+    graph = ctx['graph']
+    neighbors = percolacao.undirected_neighbors(graph)
+    for seed in range(20):
+        percolacao.largest_component_curve(neighbors, np.random.default_rng(seed).permutation(len(graph)).tolist())
+    percolacao.largest_component_curve(neighbors, percolacao.adaptive_degree_order(neighbors))
+
+
+# Figures of the map pages from the pages' builders, with their default controls
+def _figure_mapa_rotas(ctx):
+    mapa_rotas.build_figure(ctx['view'], 1, True, 0.1, True, False).to_json()
+
+
+def _figure_centralidade(ctx):
+    table = centralidade.centrality_table(ctx['view'], ctx['centrality'])
+    centralidade.build_figure(ctx['view'], table).to_json()
+
+
+def _figure_caminho_curto(ctx):
+    selected = list(ctx['path_pair'] or ())
+    caminho_curto.build_figure(ctx['view'], selected, "Menor número de conexões", ctx['path']).to_json()
+
+
+def _figure_comunidades(ctx):
+    graph = ctx['graph']
+    partition, modularity = ctx['louvain']['partition'], ctx['louvain']['modularity']
+    u, v, connections = comunidades.filtered_edges(graph, graph.degree_index.node_ids(1))
+    stats, links = estatisticas.community_statistics(u, v, estatisticas.label_array(graph, partition))
+    stats = stats.sort_values('size', ascending=False, kind='stable')
+    linked = stats[stats['internal_edges'] + stats['external_edges'] > 0]
+    comunidades.build_map(ctx['view'], partition, modularity, connections).to_json()
+    comunidades.build_matrix(links, linked['community'].to_numpy()[:comunidades.MATRIX_COMMUNITIES]).to_json()
+
+
+def _figure_robustez(ctx):
+    state, removed = ctx['robustness']
+    robustez.build_map(ctx['view'], state, removed).to_json()
+
+
+# (name, function, largest graph in nodes it is run on; None: always)
+STAGES = [
+    ("parse", _parse, None),
+    ("load_data", _load_data, None),
+    ("graph_build", _graph_build, None),
+    ("route_aggregation", lambda ctx: grafo.edge_table(ctx['graph']), None),
+    ("degree_table", _degree_table, None),
+    ("degree_centrality", _centrality('degree', lambda graph: nx.degree_centrality(graph.G)), None),
+    ("betweenness", _centrality('betweenness', intermediacao.betweenness_centrality), 20000),
+    ("closeness", _centrality('closeness', esparsa.closeness_centrality), 20000),
+    ("eigenvector", _centrality('eigenvector', lambda graph: esparsa.eigenvector_centrality(graph, max_iter=1000)), None),
+    ("pagerank", _centrality('pagerank', esparsa.pagerank), None),
+    ("katz", _centrality('katz', esparsa.katz_centrality), None),
+    ("louvain", _louvain, 200000),
+    ("hop_distances", _hop_distances, 20000),
+    ("shortest_path", _shortest_path, None),
+    ("robustness", _robustness, 200000),
+    ("percolation", _percolation, 200000),
+    ("figure_mapa_rotas", _figure_mapa_rotas, 200000),
+    # Needs the betweenness and closeness results
+    ("figure_centralidade", _figure_centralidade, 20000),
+    ("figure_caminho_curto", _figure_caminho_curto, 200000),
+    ("figure_comunidades", _figure_comunidades, 200000),
+    ("figure_robustez", _figure_robustez, 200000),
+]
+
+
+def _measure(function, ctx, repeat, warmup):
+    for _ in range(warmup):
+        function(ctx)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(ctx)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'seconds': min(times),
+        'median_seconds': float(np.median(times)),
+        'peak_mb': peak / 2**20,
+    }
+
+
+def run_scale(name, repeat, warmup):
+    scale = SCALES[name]
+    ctx = {'countries': scale['countries'], 'base_dir': ROOT}
+    tmp_dir = None
+    if scale.get('factor'):
+        tmp_dir = tempfile.mkdtemp(prefix=f"{name}-")
+        sintetico.generate(tmp_dir, scale=scale['factor'], base_dir=ROOT)
+        ctx['base_dir'] = tmp_dir
+        dados.load_tables(tmp_dir)  # fills the columnar cache, as on a second app start
+
+    results = {}
+    try:
+        for stage, function, max_nodes in STAGES:
+            nodes = len(ctx['graph']) if 'graph' in ctx else 0
+            if max_nodes is not None and nodes > max_nodes:
+                results[stage] = {'skipped': f"more than {max_nodes} nodes"}
+                print(f"  {stage:<22} ignorado ({nodes} nós)", flush=True)
+                continue
+            results[stage] = _measure(function, ctx, repeat, warmup)
+            print(f"  {stage:<22} {results[stage]['seconds']:9.3f} s  {results[stage]['peak_mb']:9.1f} MB", flush=True)
+        results['graph'] = {'nodes': len(ctx['graph']), 'edges': len(ctx['graph'].src)}
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+# Stages slower than the baseline by more than `tolerance` (relative) and `min_seconds`
+# (absolute, so sub-millisecond noise is not flagged), as printable lines
+def compare(results, baseline, tolerance, min_seconds):
+    regressions = []
+    for scale, stages in results['scales'].items():
+        for stage, current in stages.items():
+            before = baseline.get('scales', {}).get(scale, {}).get(stage, {})
+            if 'seconds' not in current or 'seconds' not in before:
+                continue
+            ratio = current['seconds'] / before['seconds'] if before['seconds'] else np.inf
+            line = (f"{scale:<16} {stage:<22} {before['seconds']:9.3f} s -> {current['seconds']:9.3f} s "
+                    f"({ratio - 1:+.0%})  memória {before['peak_mb']:.1f} -> {current['peak_mb']:.1f} MB")
+            print(line)
+            if ratio > 1 + tolerance and current['seconds'] - before['seconds'] > min_seconds:
+                regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before timing each stage")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "resultado.json"))
+    parser.add_argument("--baseline", help="earlier output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    results = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'warmup': args.warmup,
+        'scales': {},
+    }
+    for name in args.scales:
+        print(name, flush=True)
+        results['scales'][name] = run_scale(name, args.repeat, args.warmup)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"resultados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} etapa(s) mais lenta(s) que a linha de base:")
+            print("\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Latency of k-shortest itineraries on the world graph.
+
+Run from the repository root:
+
+    python benchmarks/itinerarios.py --pairs 50 --k 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dados  # noqa: E402
+import grafo  # noqa: E402
+import itinerarios  # noqa: E402
+
+
+def _summary(label, times):
+    if not times:
+        print(f"{label:<28} sem consultas")
+        return
+    ms = np.array(times) * 1000
+    print(f"{label:<28} n={len(ms):<4} mediana={np.median(ms):8.1f} ms  "
+          f"p95={np.percentile(ms, 95):8.1f} ms  máx={ms.max():8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=50, help="random airport pairs with a path")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    airports, routes = dados.load_tables()
+    start = time.perf_counter()
+    graph = grafo.build_graph(airports, routes)
+    print(f"grafo mundial: {len(graph)} aeroportos, {len(graph.src)} arestas "
+          f"({time.perf_counter() - start:.2f} s)")
+
+    start = time.perf_counter()
+    index = itinerarios.edge_index(graph)
+    print(f"índice de arestas: {len(index.airlines)} companhias, {len(index.equipment)} aeronaves "
+          f"({time.perf_counter() - start:.2f} s)")
+
+    # Endpoints with both outgoing and incoming flights; pairs with no path are timed apart
+    out_degree = np.diff(graph.indptr)
+    in_degree = np.bincount(graph.dst, minlength=len(graph))
+    candidates = graph.node_ids[(out_degree > 0) & (in_degree > 0)]
+    rng = np.random.default_rng(args.seed)
+    busiest = index.airlines[np.bincount(index.airline_code).argmax()]
+
+    times = {"km": [], "hops": [], "km, uma companhia": []}
+    no_path = []
+    while len(times["km"]) < args.pairs:
+        src_id, dst_id = rng.choice(candidates, 2, replace=False).tolist()
+        start = time.perf_counter()
+        found = itinerarios.k_shortest_paths(graph, src_id, dst_id, k=args.k)
+        elapsed = time.perf_counter() - start
+        if not found:
+            no_path.append(elapsed)
+            continue
+        times["km"].append(elapsed)
+
+        start = time.perf_counter()
+        itinerarios.k_shortest_paths(graph, src_id, dst_id, k=args.k, weight='hops')
+        times["hops"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        itinerarios.k_shortest_paths(graph, src_id, dst_id, k=args.k, airlines=[busiest])
+        times["km, uma companhia"].append(time.perf_counter() - start)
+
+    print(f"k={args.k}, semente={args.seed}, companhia restrita={busiest}")
+    for label, values in times.items():
+        _summary(label, values)
+    _summary("sem caminho", no_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Memory per concurrent session of the Streamlit app.
+
+Opens N headless sessions (streamlit.testing) in one process, as the server would,
+each on a page with airports selected or removed, and reports the state each session
+holds on top of the shared store plus the growth of the process resident set.
+
+Run from the repository root:
+
+    python benchmarks/sessoes.py --sessions 50
+"""
+import argparse
+import os
+import resource
+import sys
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import armazem  # noqa: E402
+
+# Pages visited in turn, with the selections each one keeps in the session
+SCENARIOS = (
+    ("Caminho Mais Curto", {'selected_airports': [2564, 2531]}),
+    ("Robustez da Rede", {'removed_nodes': {2564, 2531, 2537}}),
+    ("Comunidades e Clusters", {}),
+    ("Mapa de Rotas Interativo", {}),
+)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--countries", default="Brazil", help="comma separated; empty for the world")
+    args = parser.parse_args()
+    countries = [c for c in args.countries.split(",") if c]
+
+    os.chdir(ROOT)
+    sessions = []
+    session_bytes = []
+    rss = [_rss_mb()]
+    for i in range(args.sessions):
+        page, selections = SCENARIOS[i % len(SCENARIOS)]
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+        at.run()
+        at.sidebar.multiselect[0].set_value(countries).run()
+        at.selectbox[0].select(page).run()
+        for key, value in selections.items():
+            at.session_state[key] = value
+        at.run()
+        sessions.append(at)
+        session_bytes.append(armazem.session_bytes(at.session_state.to_dict()))
+        rss.append(_rss_mb())
+
+    kb = np.array(session_bytes) / 1024
+    growth = np.diff(rss)[1:]  # the first session also loads the store and the page modules
+    print(f"{args.sessions} sessões ({args.countries or 'mundo'})")
+    print(f"  estado por sessão: mediana {np.median(kb):.1f} KB, máx {kb.max():.1f} KB")
+    print(f"  processo: {rss[0]:.0f} MB -> {rss[1]:.0f} MB (1ª sessão) -> {rss[-1]:.0f} MB")
+    if len(growth):
+        print(f"  crescimento por sessão adicional: {np.mean(growth):.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Time to first paint of the Streamlit app, compared with an earlier revision.
+
+Each measurement starts a fresh Python process that runs the app headlessly
+(streamlit.testing) until the first script run finishes, so interpreter start-up,
+imports, data loading and the first page all count. Switching to each page is then
+timed in its own process. The baseline revision is extracted with `git archive`.
+
+Run from the repository root:
+
+    python benchmarks/startup.py --baseline HEAD --runs 5
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("plotly", "matplotlib", "seaborn", "community")
+PAGES = (
+    "Mapa de Rotas Interativo",
+    "Dashboard de Grau",
+    "Centralidade",
+    "Caminho Mais Curto",
+    "Comunidades e Clusters",
+    "Robustez da Rede",
+)
+
+# Runs in the child process; T0 is set before anything is imported
+CHILD = """
+import time
+T0 = time.perf_counter()
+import json, sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=600)
+at.run()
+result = {{"first_paint": time.perf_counter() - T0, "page": at.selectbox[0].value,
+           "heavy": [m for m in {heavy!r} if m in sys.modules]}}
+page = {page!r}
+if page:
+    start = time.perf_counter()
+    at.selectbox[0].select(page).run()
+    result["switch"] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def _run(tree, page=None):
+    code = CHILD.format(app=os.path.join(tree, "app.py"), heavy=HEAVY_MODULES, page=page)
+    env = dict(os.environ, PYTHONHASHSEED="0")
+    out = subprocess.run([sys.executable, "-c", code], cwd=tree, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _measure(label, tree, runs):
+    _run(tree)  # warm-up: fills the on-disk caches of this tree
+    first = [_run(tree) for _ in range(runs)]
+    paint = np.array([r["first_paint"] for r in first])
+    print(f"\n{label}")
+    print(f"  primeira pintura ({first[0]['page']}): mediana {np.median(paint):.2f} s, "
+          f"mín {paint.min():.2f} s")
+    print(f"  bibliotecas pesadas carregadas: {', '.join(first[0]['heavy']) or 'nenhuma'}")
+    switches = {}
+    for page in PAGES:
+        switches[page] = float(np.median([_run(tree, page)["switch"] for _ in range(runs)]))
+        print(f"  troca para {page:<26} {switches[page]:.2f} s")
+    return {"first_paint": float(np.median(paint)), "heavy": first[0]["heavy"], "switch": switches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default="HEAD", help="git revision to compare against")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="write both measurements as JSON")
+    args = parser.parse_args()
+
+    baseline_dir = tempfile.mkdtemp(prefix="startup-")
+    try:
+        archive = subprocess.run(["git", "archive", args.baseline], cwd=ROOT,
+                                 capture_output=True, check=True).stdout
+        subprocess.run(["tar", "-x", "-C", baseline_dir], input=archive, check=True)
+        results = {
+            "baseline": _measure(f"antes ({args.baseline})", baseline_dir, args.runs),
+            "current": _measure("depois (árvore de trabalho)", ROOT, args.runs),
+        }
+    finally:
+        shutil.rmtree(baseline_dir, ignore_errors=True)
+
+    before, after = results["baseline"]["first_paint"], results["current"]["first_paint"]
+    print(f"\nprimeira pintura: {before:.2f} s -> {after:.2f} s ({after / before - 1:+.0%})")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
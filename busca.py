@@ -0,0 +1,77 @@
+import heapq
+
+import numpy as np
+
+import geo
+import grafo
+import medicao
+
+
+# Best-first search over CSR arrays from src to dst (positions). `heuristic` is a lower
+# bound on the remaining cost per node (zeros give plain Dijkstra). Edges whose
+# `edge_ok` entry is false, edges in `blocked_edges`, nodes in `blocked_nodes` and nodes
+# with an infinite heuristic (known not to reach dst) are skipped as they are met, so
+# constrained searches never touch the excluded part of the graph.
+# Returns (node positions, edge indices, cost) or None when dst is unreachable.
+def search(indptr, indices, weights, heuristic, src, dst, edge_ok=None, blocked_nodes=(), blocked_edges=()):
+    best = {src: 0.0}
+    parent = {src: (-1, -1)}
+    heap = [(heuristic[src], 0.0, src)]
+    closed = set()
+    while heap:
+        _, cost, v = heapq.heappop(heap)
+        if v == dst:
+            nodes, edges = [v], []
+            while parent[v][0] >= 0:
+                v, e = parent[v]
+                nodes.append(v)
+                edges.append(e)
+            return nodes[::-1], edges[::-1], cost
+        if v in closed:
+            continue
+        closed.add(v)
+        for e in range(indptr[v], indptr[v + 1]):
+            if edge_ok is not None and not edge_ok[e] or e in blocked_edges:
+                continue
+            u = indices[e]
+            if u in blocked_nodes or heuristic[u] == np.inf:
+                continue
+            new_cost = cost + weights[e]
+            if new_cost < best.get(u, np.inf):
+                best[u] = new_cost
+                parent[u] = (v, e)
+                heapq.heappush(heap, (new_cost + heuristic[u], new_cost, u))
+    return None
+
+
+# Straight great-circle distance from every node of the graph to position dst, a lower
+# bound on any route there since every leg is at least that long
+def distance_heuristic(graph, dst):
+    lat = graph.airports['Latitude'].to_numpy()
+    lon = graph.airports['Longitude'].to_numpy()
+    return geo.haversine_km(lat, lon, lat[dst], lon[dst]).tolist()
+
+
+# Flights still needed from every node to position dst, from a BFS over the reversed
+# edges; removing edges or nodes only makes routes longer, so it stays a lower bound.
+# Nodes that cannot reach dst at all get infinity.
+def hop_heuristic(graph, dst):
+    in_indptr, in_indices = graph.reverse_csr
+    hops = grafo.bfs_distances(in_indptr, in_indices, np.array([dst]))[0].astype(float)
+    hops[hops < 0] = np.inf
+    return hops.tolist()
+
+
+# Shortest path by great-circle distance between two airports, with A* guided by
+# distance_heuristic. Returns (airport IDs, km) or (None, None) when there is no path.
+@medicao.timed()
+def astar_path(graph, src_id, dst_id):
+    src, dst = (int(p) for p in graph.positions([src_id, dst_id]))
+    if src < 0 or dst < 0:
+        raise KeyError(src_id if src < 0 else dst_id)
+
+    found = search(graph.indptr, graph.indices.tolist(), graph.edge_km, distance_heuristic(graph, dst), src, dst)
+    if found is None:
+        return None, None
+    nodes, _, cost = found
+    return graph.node_ids[nodes].tolist(), cost
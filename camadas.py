@@ -0,0 +1,57 @@
+import numpy as np
+import plotly.graph_objects as go
+
+import grafo
+import medicao
+
+
+# Lon/lat arrays for a set of segments: [x0, x1, nan, x0, x1, nan, ...], NaN breaks the line
+def segment_coordinates(airports, src_ids, dst_ids):
+    coords = airports.drop_duplicates('Airport ID').set_index('Airport ID')[['Longitude', 'Latitude']]
+    src = coords.reindex(np.asarray(src_ids)).to_numpy(dtype=float)
+    dst = coords.reindex(np.asarray(dst_ids)).to_numpy(dtype=float)
+
+    # Routes touching an airport without coordinates are skipped, as before
+    known = ~(np.isnan(src).any(axis=1) | np.isnan(dst).any(axis=1))
+    src, dst = src[known], dst[known]
+
+    segments = np.full((len(src), 3, 2), np.nan)
+    segments[:, 0] = src
+    segments[:, 1] = dst
+    segments = segments.reshape(-1, 2)
+    return segments[:, 0], segments[:, 1]
+
+
+def _line_trace(lon, lat, line, **kwargs):
+    kwargs.setdefault('showlegend', False)
+    kwargs.setdefault('hoverinfo', 'none')
+    return go.Scattergeo(lon=lon, lat=lat, mode='lines', line=line, **kwargs)
+
+
+# Airport pairs linked by `routes`, each pair once whatever its direction or number of
+# airlines, as (src_ids, dst_ids)
+def route_pairs(routes):
+    src = routes['Source airport ID'].to_numpy(dtype=np.int64)
+    dst = routes['Destination airport ID'].to_numpy(dtype=np.int64)
+    low, high = np.minimum(src, dst), np.maximum(src, dst)
+    width = int(high.max()) + 1 if len(high) else 1
+    keys = grafo.sorted_unique(low * width + high)
+    return keys // width, keys % width
+
+
+# All routes as a single Scattergeo trace instead of one trace per route, drawing each
+# airport pair once
+@medicao.timed()
+def route_layer(airports, routes, line, **kwargs):
+    src_ids, dst_ids = route_pairs(routes)
+    medicao.count("camadas.routes", len(routes))
+    medicao.count("camadas.pairs", len(src_ids))
+    lon, lat = segment_coordinates(airports, src_ids, dst_ids)
+    return _line_trace(lon, lat, line, **kwargs)
+
+
+# Consecutive legs of an airport ID path as one line trace
+def path_layer(airports, path, line, **kwargs):
+    path = list(path)
+    lon, lat = segment_coordinates(airports, path[:-1], path[1:])
+    return _line_trace(lon, lat, line, **kwargs)
@@ -1,168 +1,82 @@
 import streamlit as st
 import plotly.graph_objects as go
-import networkx as nx
 import numpy as np
 
-# Add CSS to fix metric text color
-st.markdown("""
-<style>
-[data-testid="metric-container"] {
-    background-color: #f0f2f6;
-    border: 1px solid #d3d3d3;
-    padding: 10px;
-    border-radius: 5px;
-}
-
-[data-testid="metric-container"] label {
-    color: #262730 !important;
-    font-size: 14px !important;
-}
-
-[data-testid="metric-container"] [data-testid="metric-value"] {
-    color: #262730 !important;
-    font-size: 24px !important;
-    font-weight: bold !important;
-}
-
-div[data-testid="metric-container"] * {
-    color: #262730 !important;
-}
-
-/* More aggressive selectors for metrics */
-.stMetric, .stMetric * {
-    color: #000000 !important;
-}
-
-div[data-testid*="metric"] {
-    color: #000000 !important;
-}
-
-div[data-testid*="metric"] * {
-    color: #000000 !important;
-}
-
-div[data-testid*="metric"] div {
-    color: #000000 !important;
-}
-
-div[data-testid*="metric"] span {
-    color: #000000 !important;
-}
-
-/* Target all possible metric elements */
-[data-testid*="metric"] {
-    color: #000000 !important;
-}
-
-[data-testid*="metric"] * {
-    color: #000000 !important;
-}
-
-/* Override any white text in the main container */
-.main .block-container * {
-    color: #000000 !important;
-}
-
-/* Ensure metric values and labels are black */
-div[data-testid="metric-container"] div,
-div[data-testid="metric-container"] span,
-div[data-testid="metric-container"] p {
-    color: #000000 !important;
-}
-</style>
-""", unsafe_allow_html=True)
-
-airports_br = st.session_state.airports_br
-routes_br = st.session_state.routes_br
-G_br = st.session_state.G_br
-
-st.markdown("### Mapa Interativo - Clique em dois aeroportos para ver o menor número de conexões")
-
-# Initialize session state for selected airports
-if 'selected_airports' not in st.session_state:
-    st.session_state.selected_airports = []
-
-# Filter airports by minimum connections (degree > 1)
-airport_degrees = dict(G_br.degree())
-airports_br['Airport ID'] = airports_br['Airport ID'].astype(int)
-degree_mapping = {int(k): v for k, v in airport_degrees.items()}
-
-filtered_airports = airports_br[
-    airports_br['Airport ID'].map(degree_mapping).fillna(0) > 1
-].copy()
-
-# Create the figure
-fig = go.Figure()
-
-# Calculate marker sizes based on connections
-degrees = [degree_mapping.get(aid, 0) for aid in filtered_airports['Airport ID']]
-marker_sizes = []
-for deg in degrees:
-    if deg <= 10:
-        size = max(6, 6 + deg * 0.75)
-    else:
-        size = max(12, min(30, 12 + (deg - 10) * 0.25))
-    marker_sizes.append(size)
-
-# Determine colors based on selection
-colors = []
-for aid in filtered_airports['Airport ID']:
-    if aid in st.session_state.selected_airports:
-        colors.append('#0000FF')  # Bright blue
-    else:
-        colors.append('#87CEEB')  # Light blue
-
-# Add airports
-fig.add_trace(go.Scattergeo(
-    lon=filtered_airports['Longitude'],
-    lat=filtered_airports['Latitude'],
-    text=filtered_airports['IATA'],
-    customdata=filtered_airports['Airport ID'],
-    mode='markers+text',
-    textfont=dict(size=12, color='#000000'),
-    textposition="top center",
-    marker=dict(
-        size=marker_sizes,
-        color=colors,
-        line=dict(width=3, color='#000000')
-    ),
-    name='Aeroportos',
-    hovertemplate='<b>%{text}</b><br>Conexões: ' + 
-                  filtered_airports['Airport ID'].map(degree_mapping).astype(str) + 
-                  '<extra></extra>'
-))
-
-# Add all routes in gray
-filtered_airport_ids = set(filtered_airports['Airport ID'])
-filtered_routes = routes_br[
-    routes_br['Source airport ID'].isin(filtered_airport_ids) &
-    routes_br['Destination airport ID'].isin(filtered_airport_ids)
-]
-
-for _, row in filtered_routes.iterrows():
-    src = airports_br[airports_br['Airport ID'] == row['Source airport ID']]
-    dst = airports_br[airports_br['Airport ID'] == row['Destination airport ID']]
-    if not src.empty and not dst.empty:
-        fig.add_trace(go.Scattergeo(
-            lon=[src.iloc[0]['Longitude'], dst.iloc[0]['Longitude']],
-            lat=[src.iloc[0]['Latitude'], dst.iloc[0]['Latitude']],
-            mode='lines',
-            line=dict(width=1, color='rgba(128,128,128,0.4)'),
-            showlegend=False,
-            hoverinfo='none'
-        ))
+import busca
+import camadas
+import distancias
+import espacial
+import itinerarios
+import medicao
+
+
+# Map of a region with the selected airports highlighted and, when given, the path
+# between them; kept out of render so benchmarks/etapas.py times this same code
+def build_figure(view, selected, search_mode, path=None):
+    airports_br = view.airports
+    graph_br = view.graph
+
+    # Filter airports by minimum connections (degree > 1) from the degree-sorted index
+    degree_index = graph_br.degree_index
+    filtered_airports = degree_index.airports(2)
+
+    # Create the figure
+    fig = go.Figure()
+
+    # Calculate marker sizes based on connections
+    degrees = filtered_airports['Degree'].tolist()
+    marker_sizes = []
+    for deg in degrees:
+        if deg <= 10:
+            size = max(6, 6 + deg * 0.75)
+        else:
+            size = max(12, min(30, 12 + (deg - 10) * 0.25))
+        marker_sizes.append(size)
 
-# If two airports are selected, show shortest path
-if len(st.session_state.selected_airports) == 2:
-    src_id, dst_id = st.session_state.selected_airports
-    try:
-        path = nx.shortest_path(G_br, source=src_id, target=dst_id)
-        
+    # Determine colors based on selection
+    colors = []
+    for aid in filtered_airports['Airport ID']:
+        if aid in selected:
+            colors.append('#0000FF')  # Bright blue
+        else:
+            colors.append('#87CEEB')  # Light blue
+
+    # Add airports
+    fig.add_trace(go.Scattergeo(
+        lon=filtered_airports['Longitude'],
+        lat=filtered_airports['Latitude'],
+        text=filtered_airports['IATA'],
+        customdata=filtered_airports['Airport ID'],
+        mode='markers+text',
+        textfont=dict(size=12, color='#000000'),
+        textposition="top center",
+        marker=dict(
+            size=marker_sizes,
+            color=colors,
+            line=dict(width=3, color='#000000')
+        ),
+        name='Aeroportos',
+        hovertemplate='<b>%{text}</b><br>Conexões: ' + 
+                      filtered_airports['Degree'].astype(str) + 
+                      '<extra></extra>'
+    ))
+
+    # Add all routes in gray
+    filtered_routes = degree_index.routes(2)
+
+    fig.add_trace(camadas.route_layer(
+        airports_br, filtered_routes,
+        line=dict(width=1, color='rgba(128,128,128,0.4)')
+    ))
+
+    # Shortest path on top, when there is one
+    if path is not None:
         # Add shortest path markers
-        path_lons = [airports_br.loc[airports_br["Airport ID"] == i, "Longitude"].values[0] for i in path]
-        path_lats = [airports_br.loc[airports_br["Airport ID"] == i, "Latitude"].values[0] for i in path]
-        path_codes = [airports_br.loc[airports_br["Airport ID"] == i, "IATA"].values[0] for i in path]
-        
+        path_info = graph_br.node_table(path, ['Longitude', 'Latitude', 'IATA'])
+        path_lons = path_info['Longitude']
+        path_lats = path_info['Latitude']
+        path_codes = path_info['IATA']
+
         fig.add_trace(go.Scattergeo(
             lon=path_lons,
             lat=path_lats,
@@ -171,85 +85,284 @@ if len(st.session_state.selected_airports) == 2:
             text=path_codes,
             textposition="top center",
             textfont=dict(size=14, color='#000000'),
-            name='Menor Número de Conexões',
+            name=search_mode,
             showlegend=True
         ))
-        
+
         # Add shortest path lines
-        for i in range(len(path) - 1):
-            src = airports_br[airports_br["Airport ID"] == path[i]]
-            dst = airports_br[airports_br["Airport ID"] == path[i+1]]
-            fig.add_trace(go.Scattergeo(
-                lon=[src.iloc[0]["Longitude"], dst.iloc[0]["Longitude"]],
-                lat=[src.iloc[0]["Latitude"], dst.iloc[0]["Latitude"]],
-                mode='lines',
-                line=dict(width=6, color='#0000FF'),
-                showlegend=False,
-                hoverinfo='none'
-            ))
-        
-        # Show path info
-        src_name = airports_br.loc[airports_br["Airport ID"] == src_id, "Name"].values[0]
-        dst_name = airports_br.loc[airports_br["Airport ID"] == dst_id, "Name"].values[0]
-        st.success(f"Menor caminho encontrado: {len(path)-1} conexões entre {src_name} e {dst_name}")
-        
-    except nx.NetworkXNoPath:
-        st.error("Não existe caminho entre os aeroportos selecionados.")
-
-# Layout
-fig.update_layout(
-    title={
-        'text': f'Rede Aérea Brasileira - Menor Número de Conexões',
-        'x': 0.5,
-        'xanchor': 'center',
-        'font': {'color': '#000000', 'size': 20}
-    },
-    geo=dict(
-        scope='south america',
-        projection_type='natural earth',
-        showland=True,
-        landcolor='rgb(240, 240, 240)',
-        coastlinecolor='rgb(0, 0, 0)',
-        showocean=True,
-        oceancolor='rgb(255, 255, 255)',
-        showcountries=True,
-        countrycolor='rgb(0, 0, 0)',
-        center=dict(lat=-15, lon=-55),
-        projection_scale=1.2
-    ),
-    height=700,
-    showlegend=True,
-    plot_bgcolor='white',
-    paper_bgcolor='white',
-    font=dict(color='#000000')
-)
-
-# Display the plot and capture clicks
-clicked_data = st.plotly_chart(fig, use_container_width=True, on_select="rerun")
-
-# Handle click events
-if clicked_data and 'selection' in clicked_data and clicked_data['selection']['points']:
-    point = clicked_data['selection']['points'][0]
-    if 'customdata' in point:
-        clicked_airport_id = int(point['customdata'])
-        
-        if clicked_airport_id not in st.session_state.selected_airports:
-            st.session_state.selected_airports.append(clicked_airport_id)
+        fig.add_trace(camadas.path_layer(
+            airports_br, path,
+            line=dict(width=6, color='#0000FF')
+        ))
+
+    # Layout
+    fig.update_layout(
+        title={
+            'text': f'Rede Aérea ({view.name}) - {search_mode}',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'color': '#000000', 'size': 20}
+        },
+        geo=dict(
+            **view.geo_view,
+            projection_type='natural earth',
+            showland=True,
+            landcolor='rgb(240, 240, 240)',
+            coastlinecolor='rgb(0, 0, 0)',
+            showocean=True,
+            oceancolor='rgb(255, 255, 255)',
+            showcountries=True,
+            countrycolor='rgb(0, 0, 0)',
+            projection_scale=1.2
+        ),
+        height=700,
+        showlegend=True,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(color='#000000')
+    )
+    return fig
+
+
+def render(view):
+    # Add CSS to fix metric text color
+    st.markdown("""
+    <style>
+    [data-testid="metric-container"] {
+        background-color: #f0f2f6;
+        border: 1px solid #d3d3d3;
+        padding: 10px;
+        border-radius: 5px;
+    }
+
+    [data-testid="metric-container"] label {
+        color: #262730 !important;
+        font-size: 14px !important;
+    }
+
+    [data-testid="metric-container"] [data-testid="metric-value"] {
+        color: #262730 !important;
+        font-size: 24px !important;
+        font-weight: bold !important;
+    }
+
+    div[data-testid="metric-container"] * {
+        color: #262730 !important;
+    }
+
+    /* More aggressive selectors for metrics */
+    .stMetric, .stMetric * {
+        color: #000000 !important;
+    }
+
+    div[data-testid*="metric"] {
+        color: #000000 !important;
+    }
+
+    div[data-testid*="metric"] * {
+        color: #000000 !important;
+    }
+
+    div[data-testid*="metric"] div {
+        color: #000000 !important;
+    }
+
+    div[data-testid*="metric"] span {
+        color: #000000 !important;
+    }
+
+    /* Target all possible metric elements */
+    [data-testid*="metric"] {
+        color: #000000 !important;
+    }
+
+    [data-testid*="metric"] * {
+        color: #000000 !important;
+    }
+
+    /* Override any white text in the main container */
+    .main .block-container * {
+        color: #000000 !important;
+    }
+
+    /* Ensure metric values and labels are black */
+    div[data-testid="metric-container"] div,
+    div[data-testid="metric-container"] span,
+    div[data-testid="metric-container"] p {
+        color: #000000 !important;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    graph_br = view.graph
+
+    st.markdown("### Mapa Interativo - Clique em dois aeroportos para ver o menor número de conexões")
+
+    # Initialize session state for selected airports
+    if 'selected_airports' not in st.session_state:
+        st.session_state.selected_airports = []
+
+    medicao.count("caminho_curto.airports", graph_br.degree_index.count(2))
+
+    # Search criterion: fewest flights or shortest great-circle distance
+    search_mode = st.radio(
+        "Critério do caminho:",
+        ["Menor número de conexões", "Menor distância (km)"],
+        horizontal=True
+    )
+    by_distance = search_mode == "Menor distância (km)"
+
+    # All-pairs hop distances, built once per graph and memory-mapped from disk
+    with st.spinner("Calculando distâncias..."):
+        hop_distances = distancias.hop_distances(graph_br)
+
+    # If two airports are selected, show shortest path
+    path = None
+    if len(st.session_state.selected_airports) == 2:
+        src_id, dst_id = st.session_state.selected_airports
+        if by_distance:
+            path, path_km = busca.astar_path(graph_br, src_id, dst_id)
+        else:
+            path = hop_distances.path(src_id, dst_id)
+        if path is not None:
+            # Show path info
+            src_name = graph_br.by_id.at[src_id, "Name"]
+            dst_name = graph_br.by_id.at[dst_id, "Name"]
+            if by_distance:
+                st.success(f"Menor distância encontrada: {path_km:,.0f} km em {len(path)-1} conexões entre {src_name} e {dst_name}")
+            else:
+                st.success(f"Menor caminho encontrado: {len(path)-1} conexões entre {src_name} e {dst_name}")
+
+        else:
+            st.error("Não existe caminho entre os aeroportos selecionados.")
+
+    fig = build_figure(view, st.session_state.selected_airports, search_mode, path)
+
+    # Display the plot and capture clicks
+    with medicao.stage("caminho_curto.map"):
+        clicked_data = st.plotly_chart(fig, use_container_width=True, on_select="rerun")
+
+    def select(airport_id):
+        if airport_id not in st.session_state.selected_airports:
+            st.session_state.selected_airports.append(airport_id)
             if len(st.session_state.selected_airports) > 2:
                 st.session_state.selected_airports = st.session_state.selected_airports[-2:]
         st.rerun()
 
-# Control panel
-col1, col2, col3 = st.columns([1, 1, 1])
+    # Handle click events: a marker gives its airport, any other point of the map (a route
+    # line) the airport nearest to it
+    if clicked_data and 'selection' in clicked_data and clicked_data['selection']['points']:
+        point = clicked_data['selection']['points'][0]
+        if 'customdata' in point:
+            select(int(point['customdata']))
+        elif 'lat' in point and 'lon' in point:
+            nearest = graph_br.spatial_index.nearest(point['lat'], point['lon'])
+            if nearest:
+                select(nearest[0][0])
 
-with col2:
-    if st.button("Limpar Seleção"):
-        st.session_state.selected_airports = []
-        st.rerun()
+    # Control panel
+    col1, col2, col3 = st.columns([1, 1, 1])
+
+    with col1:
+        # A typed coordinate selects the nearest airport
+        with st.form("coordenadas_caminho", clear_on_submit=True):
+            coordinate_text = st.text_input("Coordenadas (lat, lon):", placeholder="-23.43, -46.47")
+            if st.form_submit_button("Selecionar Mais Próximo"):
+                coordinates = espacial.parse_coordinates(coordinate_text)
+                nearest = graph_br.spatial_index.nearest(*coordinates) if coordinates else []
+                if nearest:
+                    select(nearest[0][0])
+                else:
+                    st.error("Use o formato latitude, longitude (ex.: -23.43, -46.47)")
+
+    with col2:
+        if st.button("Limpar Seleção"):
+            st.session_state.selected_airports = []
+            st.rerun()
+
+    # Show selected airports
+    if st.session_state.selected_airports:
+        st.markdown("**Aeroportos Selecionados:**")
+        for i, airport_id in enumerate(st.session_state.selected_airports):
+            airport_info = graph_br.by_id.loc[airport_id]
+            st.write(f"{i+1}. {airport_info['Name']} ({airport_info['IATA']})")
+
+    # Top-k alternative itineraries, optionally restricted to airlines and aircraft types
+    if len(st.session_state.selected_airports) == 2:
+        src_id, dst_id = st.session_state.selected_airports
+        edge_index = itinerarios.edge_index(graph_br)
+
+        st.markdown("### Itinerários Alternativos")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            k = st.slider("Número de itinerários:", min_value=1, max_value=10, value=5)
+        with col2:
+            airlines = st.multiselect("Companhias aéreas:", edge_index.airlines.tolist())
+        with col3:
+            equipment = st.multiselect("Aeronaves:", edge_index.equipment.tolist())
+
+        options = itinerarios.k_shortest_paths(
+            graph_br, src_id, dst_id, k=k,
+            weight='km' if by_distance else 'hops',
+            airlines=airlines or None,
+            equipment=equipment or None
+        )
+        if options:
+            iata = graph_br.by_id['IATA']
+            st.dataframe(
+                {
+                    'Itinerário': [' → '.join(iata.loc[option['path']].astype(str)) for option in options],
+                    'Conexões': [option['legs'] for option in options],
+                    'Distância (km)': [round(option['km']) for option in options],
+                    'Companhias por trecho': [' | '.join(', '.join(leg) for leg in option['airlines']) for option in options],
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.warning("Nenhum itinerário atende às restrições selecionadas.")
+
+    # Connections needed from the first selected airport to every other airport
+    if st.session_state.selected_airports:
+        origin_id = st.session_state.selected_airports[0]
+        origin_iata = graph_br.by_id.at[origin_id, 'IATA']
+        hops = hop_distances.distances_from(origin_id)
+        reachable_hops = hops[(hops > 0) & (hops != distancias.UNREACHABLE)]
+
+        st.markdown(f"### Conexões a partir de {origin_iata}")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Aeroportos Alcançáveis", len(reachable_hops))
+        with col2:
+            st.metric("Sem Caminho", int((hops == distancias.UNREACHABLE).sum()))
+        with col3:
+            st.metric("Máximo de Conexões", int(reachable_hops.max()) if len(reachable_hops) else 0)
+
+        if len(reachable_hops):
+            hop_values, hop_counts = np.unique(reachable_hops, return_counts=True)
+            st.dataframe(
+                {'Conexões': hop_values, 'Aeroportos': hop_counts},
+                use_container_width=True,
+                hide_index=True
+            )
+
+    # Eccentricity and diameter over the pairs that can reach each other
+    st.markdown("### Excentricidade e Diâmetro")
+    eccentricity = hop_distances.eccentricity()
+    connected = eccentricity > 0
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Diâmetro", hop_distances.diameter())
+    with col2:
+        st.metric("Raio", int(eccentricity[connected].min()) if connected.any() else 0)
+    with col3:
+        st.metric("Excentricidade Média", f"{eccentricity[connected].mean():.2f}" if connected.any() else "N/A")
 
-# Show selected airports
-if st.session_state.selected_airports:
-    st.markdown("**Aeroportos Selecionados:**")
-    for i, airport_id in enumerate(st.session_state.selected_airports):
-        airport_info = airports_br[airports_br['Airport ID'] == airport_id].iloc[0]
-        st.write(f"{i+1}. {airport_info['Name']} ({airport_info['IATA']})")
+    df_eccentricity = graph_br.node_table(graph_br.node_ids[connected], ['IATA', 'Name', 'City'])
+    df_eccentricity['Excentricidade'] = eccentricity[connected]
+    st.markdown("#### Aeroportos Mais Centrais (menor excentricidade)")
+    st.dataframe(
+        df_eccentricity.nsmallest(10, 'Excentricidade')[['IATA', 'Name', 'City', 'Excentricidade']],
+        use_container_width=True,
+        hide_index=True
+    )
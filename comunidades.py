@@ -1,231 +1,288 @@
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
-import networkx as nx
-import community as community_louvain
 import numpy as np
 import pandas as pd
 
-st.markdown("## Análise de Comunidades na Rede Aérea Brasileira")
-
-G_br = st.session_state.G_br
-airports_br = st.session_state.airports_br
-
-# Simplified interactive controls
-min_connections = st.slider("Mínimo de Conexões por Aeroporto", 0, 20, 1)
-
-# Filter airports by minimum connections
-airport_degrees = dict(G_br.degree())
-filtered_nodes = [node for node, degree in airport_degrees.items() if degree >= min_connections]
-G_filtered = G_br.subgraph(filtered_nodes).copy()
-
-if len(G_filtered.nodes()) == 0:
-    st.error("Nenhum aeroporto atende aos critérios de filtro.")
-    st.stop()
-
-# Convert to undirected and find communities
-G_undirected = G_filtered.to_undirected()
-partition = community_louvain.best_partition(G_undirected)
-
-# Calculate modularity
-modularity = community_louvain.modularity(partition, G_undirected)
-
-# Get community information
-communities = {}
-for node, comm_id in partition.items():
-    if comm_id not in communities:
-        communities[comm_id] = []
-    communities[comm_id].append(node)
-
-# Create comprehensive dataframe with community information
-community_data = []
-for node_id in G_undirected.nodes():
-    airport_info = airports_br[airports_br['Airport ID'] == node_id]
-    if not airport_info.empty:
-        community_data.append({
-            'Airport_ID': node_id,
-            'IATA': airport_info.iloc[0]['IATA'],
-            'Name': airport_info.iloc[0]['Name'],
-            'City': airport_info.iloc[0]['City'],
-            'Latitude': airport_info.iloc[0]['Latitude'],
-            'Longitude': airport_info.iloc[0]['Longitude'],
-            'Community': partition[node_id],
-            'Connections': G_undirected.degree(node_id)
-        })
-
-df_communities = pd.DataFrame(community_data)
-
-# Create color palette for communities
-colors = px.colors.qualitative.Set3
-if len(communities) > len(colors):
-    colors = colors * (len(communities) // len(colors) + 1)
-
-# Create the map
-fig = go.Figure()
-
-# Add each community as a separate trace
-for i, (comm_id, nodes) in enumerate(communities.items()):
-    comm_data = df_communities[df_communities['Community'] == comm_id]
-    
-    # Calculate marker sizes based on connections (range: 8-25)
-    connections = comm_data['Connections'].values
-    min_conn = connections.min()
-    max_conn = connections.max()
-    
-    if max_conn > min_conn:
-        normalized_connections = (connections - min_conn) / (max_conn - min_conn)
-    else:
-        normalized_connections = np.ones_like(connections)
-    
-    marker_sizes = 8 + normalized_connections * 17
-    
-    # Create hover text
-    hover_text = []
-    for _, row in comm_data.iterrows():
-        hover_text.append(
-            f"<b>{row['Name']}</b><br>"
-            f"IATA: {row['IATA']}<br>"
-            f"Cidade: {row['City']}<br>"
-            f"Comunidade: {row['Community']}<br>"
-            f"Conexões: {row['Connections']}"
+import armazem
+import estatisticas
+import medicao
+import particoes
+
+# Most communities drawn in the matrix between communities (largest ones with routes)
+MATRIX_COMMUNITIES = 40
+
+
+# Routes between the airports in node_ids (each pair once, as position arrays u, v) and
+# each of those airports' number of distinct neighbours among them
+def filtered_edges(graph, node_ids):
+    keep = np.zeros(len(graph), dtype=bool)
+    keep[graph.positions(node_ids)] = True
+    u, v = estatisticas.undirected_edges(graph, keep)
+    degree = np.bincount(u, minlength=len(graph)) + np.bincount(v, minlength=len(graph))
+    return u, v, pd.Series(degree[keep], index=graph.node_ids[keep])
+
+
+# {community: [airport_id, ...]} of a partition, in order of first appearance
+def community_members(partition):
+    communities = {}
+    for node, comm_id in partition.items():
+        if comm_id not in communities:
+            communities[comm_id] = []
+        communities[comm_id].append(node)
+    return communities
+
+
+# Map with one trace per community, markers sized by each airport's connections
+# (`connections`: Series of neighbour counts indexed by airport ID). Lives outside render
+# so benchmarks/etapas.py can time the page's own figure code.
+def build_map(view, partition, modularity, connections):
+    communities = community_members(partition)
+
+    # Create comprehensive dataframe with community information
+    df_communities = view.graph.node_table(connections.index, ['IATA', 'Name', 'City', 'Latitude', 'Longitude'])
+    df_communities['Community'] = df_communities['Airport_ID'].map(partition)
+    df_communities['Connections'] = df_communities['Airport_ID'].map(connections)
+
+    # Create color palette for communities
+    colors = px.colors.qualitative.Set3
+    if len(communities) > len(colors):
+        colors = colors * (len(communities) // len(colors) + 1)
+
+    # Create the map
+    fig = go.Figure()
+
+    # Add each community as a separate trace
+    for i, (comm_id, nodes) in enumerate(communities.items()):
+        comm_data = df_communities[df_communities['Community'] == comm_id]
+
+        # Calculate marker sizes based on connections (range: 8-25)
+        comm_connections = comm_data['Connections'].values
+        min_conn = comm_connections.min()
+        max_conn = comm_connections.max()
+
+        if max_conn > min_conn:
+            normalized_connections = (comm_connections - min_conn) / (max_conn - min_conn)
+        else:
+            normalized_connections = np.ones_like(comm_connections)
+
+        marker_sizes = 8 + normalized_connections * 17
+
+        # Create hover text
+        hover_text = []
+        for _, row in comm_data.iterrows():
+            hover_text.append(
+                f"<b>{row['Name']}</b><br>"
+                f"IATA: {row['IATA']}<br>"
+                f"Cidade: {row['City']}<br>"
+                f"Comunidade: {row['Community']}<br>"
+                f"Conexões: {row['Connections']}"
+            )
+
+        fig.add_trace(go.Scattergeo(
+            lon=comm_data['Longitude'],
+            lat=comm_data['Latitude'],
+            text=comm_data['IATA'],
+            mode='markers+text',
+            textfont=dict(size=10, color='#000000'),
+            textposition="top center",
+            marker=dict(
+                size=marker_sizes,
+                color=colors[i % len(colors)],
+                line=dict(width=1.5, color='#000000'),
+                opacity=0.8
+            ),
+            name=f'Comunidade {comm_id} ({len(nodes)} aeroportos)',
+            hovertemplate='%{customdata}<extra></extra>',
+            customdata=hover_text
+        ))
+
+    # Update geo layout
+    fig.update_geos(
+        **view.geo_view,
+        projection_type='natural earth',
+        showland=True,
+        landcolor='rgb(240, 240, 240)',
+        coastlinecolor='rgb(100, 100, 100)',
+        showocean=True,
+        oceancolor='rgb(255, 255, 255)',
+        showcountries=True,
+        countrycolor='rgb(100, 100, 100)',
+        projection_scale=1.3
+    )
+
+    # Update layout
+    fig.update_layout(
+        title={
+            'text': f'Comunidades na Rede Aérea ({view.name})<br><sub>{len(communities)} comunidades encontradas - Modularidade: {modularity:.3f}</sub>',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'color': '#000000', 'size': 20}
+        },
+        height=800,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(color='#000000'),
+        legend=dict(
+            bgcolor='rgba(255,255,255,0.8)',
+            bordercolor='#000000',
+            borderwidth=1,
+            font=dict(color='#000000')
         )
-    
-    fig.add_trace(go.Scattergeo(
-        lon=comm_data['Longitude'],
-        lat=comm_data['Latitude'],
-        text=comm_data['IATA'],
-        mode='markers+text',
-        textfont=dict(size=10, color='#000000'),
-        textposition="top center",
-        marker=dict(
-            size=marker_sizes,
-            color=colors[i % len(colors)],
-            line=dict(width=1.5, color='#000000'),
-            opacity=0.8
-        ),
-        name=f'Comunidade {comm_id} ({len(nodes)} aeroportos)',
-        hovertemplate='%{customdata}<extra></extra>',
-        customdata=hover_text
-    ))
-
-# Update geo layout
-fig.update_geos(
-    scope='south america',
-    projection_type='natural earth',
-    showland=True,
-    landcolor='rgb(240, 240, 240)',
-    coastlinecolor='rgb(100, 100, 100)',
-    showocean=True,
-    oceancolor='rgb(255, 255, 255)',
-    showcountries=True,
-    countrycolor='rgb(100, 100, 100)',
-    center=dict(lat=-15, lon=-55),
-    projection_scale=1.3
-)
-
-# Update layout
-fig.update_layout(
-    title={
-        'text': f'Comunidades na Rede Aérea Brasileira<br><sub>{len(communities)} comunidades encontradas - Modularidade: {modularity:.3f}</sub>',
-        'x': 0.5,
-        'xanchor': 'center',
-        'font': {'color': '#000000', 'size': 20}
-    },
-    height=800,
-    plot_bgcolor='white',
-    paper_bgcolor='white',
-    font=dict(color='#000000'),
-    legend=dict(
-        bgcolor='rgba(255,255,255,0.8)',
-        bordercolor='#000000',
-        borderwidth=1,
+    )
+    return fig
+
+
+# Heatmap of the routes between the communities in `order` (see estatisticas.link_matrix)
+def build_matrix(links, order):
+    fig_matrix = px.imshow(
+        estatisticas.link_matrix(links, order),
+        x=[str(c) for c in order],
+        y=[str(c) for c in order],
+        labels=dict(x="Comunidade", y="Comunidade", color="Rotas"),
+        color_continuous_scale='Blues'
+    )
+    fig_matrix.update_layout(
+        height=600,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
         font=dict(color='#000000')
     )
-)
-
-st.plotly_chart(fig, use_container_width=True)
-
-# Display statistics
-st.markdown("### Estatísticas das Comunidades")
-
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric("Número de Comunidades", len(communities))
-with col2:
-    st.metric("Modularidade", f"{modularity:.3f}")
-with col3:
-    st.metric("Aeroportos Analisados", len(G_filtered.nodes()))
-with col4:
-    avg_size = np.mean([len(comm) for comm in communities.values()])
-    st.metric("Tamanho Médio das Comunidades", f"{avg_size:.1f}")
-
-# Display community details
-st.markdown("### Detalhes das Comunidades")
-
-# Sort communities by size
-sorted_communities = sorted(communities.items(), key=lambda x: len(x[1]), reverse=True)
-
-for i, (comm_id, nodes) in enumerate(sorted_communities[:10]):  # Show top 10 communities
-    with st.expander(f"Comunidade {comm_id} ({len(nodes)} aeroportos)"):
-        
-        # Show airports in this community
-        airport_list = []
-        for node in nodes:
-            if node in airport_info:
-                info = airport_info[node]
-                degree = G_undirected.degree(node)
-                airport_list.append({
-                    'IATA': info['iata'],
-                    'Nome': info['name'],
-                    'Conexões': degree,
-                    'ID': node
-                })
-            else:
-                airport_list.append({
-                    'IATA': 'N/A',
-                    'Nome': f'Aeroporto {node}',
-                    'Conexões': G_undirected.degree(node),
-                    'ID': node
-                })
-        
-        # Sort by connections
-        airport_list.sort(key=lambda x: x['Conexões'], reverse=True)
-        
-        # Display as table with explicit styling
-        if airport_list:
-            df_display = pd.DataFrame(airport_list)
-            st.markdown("""
-            <style>
-            .stDataFrame {
-                background-color: white !important;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-            st.dataframe(df_display, use_container_width=True)
-        
-        # Community statistics
-        degrees_in_comm = [G_undirected.degree(node) for node in nodes]
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Aeroporto Mais Conectado", 
-                     f"{max(degrees_in_comm)} conexões")
-        with col2:
-            st.metric("Conectividade Média", 
-                     f"{np.mean(degrees_in_comm):.1f}")
-        with col3:
-            # Calculate internal vs external edges
-            internal_edges = 0
-            external_edges = 0
-            for node in nodes:
-                for neighbor in G_undirected.neighbors(node):
-                    if neighbor in nodes:
-                        internal_edges += 1
-                    else:
-                        external_edges += 1
-            internal_edges //= 2  # Each edge counted twice
-            
-            if internal_edges + external_edges > 0:
-                internal_ratio = internal_edges / (internal_edges + external_edges)
-                st.metric("Coesão Interna", f"{internal_ratio:.2f}")
-            else:
-                st.metric("Coesão Interna", "N/A")
\ No newline at end of file
+    return fig_matrix
+
+
+def render(view):
+    st.markdown(f"## Análise de Comunidades na Rede Aérea ({view.name})")
+
+    graph_br = view.graph
+
+    # Simplified interactive controls
+    min_connections = st.slider(
+        "Mínimo de Conexões por Aeroporto",
+        particoes.MIN_CONNECTIONS[0], particoes.MIN_CONNECTIONS[-1], 1
+    )
+
+    # Filter airports by minimum connections, straight from the degree index
+    node_ids = graph_br.degree_index.node_ids(min_connections)
+
+    if len(node_ids) == 0:
+        st.error("Nenhum aeroporto atende aos critérios de filtro.")
+        st.stop()
+
+    edges_u, edges_v, connections = filtered_edges(graph_br, node_ids)
+
+    # Seeded communities, stored per graph and slider value
+    with st.spinner("Detectando comunidades..."):
+        louvain = particoes.partition(graph_br, min_connections)
+    partition = louvain['partition']
+    modularity = louvain['modularity']
+
+    # The other slider values are computed in the background
+    particoes.precompute(graph_br)
+
+    # Get community information
+    communities = community_members(partition)
+    medicao.count("comunidades.communities", len(communities))
+
+    # Built once per region and filter (partitions are seeded), then reused from the figure store
+    fig = armazem.figure(
+        ('comunidades', view.key, graph_br.fingerprint, min_connections),
+        lambda: build_map(view, partition, modularity, connections)
+    )
+
+    with medicao.stage("comunidades.map"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Display statistics
+    st.markdown("### Estatísticas das Comunidades")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Número de Comunidades", len(communities))
+    with col2:
+        st.metric("Modularidade", f"{modularity:.3f}")
+    with col3:
+        st.metric("Aeroportos Analisados", len(node_ids))
+    with col4:
+        avg_size = np.mean([len(comm) for comm in communities.values()])
+        st.metric("Tamanho Médio das Comunidades", f"{avg_size:.1f}")
+
+    # Statistics of every community from one pass over the filtered edges
+    stats, links = estatisticas.community_statistics(edges_u, edges_v, estatisticas.label_array(graph_br, partition))
+    stats = stats.sort_values('size', ascending=False, kind='stable').reset_index(drop=True)
+
+    # Display community details
+    st.markdown("### Detalhes das Comunidades")
+
+    st.dataframe(
+        stats.rename(columns={
+            'community': 'Comunidade',
+            'size': 'Aeroportos',
+            'internal_edges': 'Arestas Internas',
+            'external_edges': 'Arestas Externas',
+            'cohesion': 'Coesão Interna',
+            'conductance': 'Condutância',
+            'max_degree': 'Grau Máximo',
+            'mean_degree': 'Grau Médio',
+            'min_degree': 'Grau Mínimo',
+        }).round(3),
+        use_container_width=True,
+        hide_index=True
+    )
+
+    # One community at a time, largest first; communities without any route (isolated
+    # airports of the filter) are left out unless there is nothing else to pick
+    linked = stats[stats['internal_edges'] + stats['external_edges'] > 0]
+    if linked.empty:
+        linked = stats
+    community_sizes = dict(zip(linked['community'].tolist(), linked['size'].tolist()))
+    comm_id = st.selectbox(
+        "Comunidade:",
+        list(community_sizes),
+        format_func=lambda c: f"Comunidade {c} ({community_sizes[c]} aeroportos)"
+    )
+    row = stats.set_index('community').loc[comm_id]
+    nodes = communities[comm_id]
+
+    # Show airports in this community
+    df_display = graph_br.node_table(nodes, ['IATA', 'Name'])
+    df_display['Conexões'] = df_display['Airport_ID'].map(connections)
+    df_display = df_display.rename(columns={'Name': 'Nome', 'Airport_ID': 'ID'})[['IATA', 'Nome', 'Conexões', 'ID']]
+
+    # Sort by connections
+    df_display = df_display.sort_values('Conexões', ascending=False, kind='stable').reset_index(drop=True)
+
+    # Display as table with explicit styling
+    if not df_display.empty:
+        st.markdown("""
+        <style>
+        .stDataFrame {
+            background-color: white !important;
+        }
+        </style>
+        """, unsafe_allow_html=True)
+        st.dataframe(df_display, use_container_width=True)
+
+    # Community statistics
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Aeroporto Mais Conectado", f"{int(row['max_degree'])} conexões")
+    with col2:
+        st.metric("Conectividade Média", f"{row['mean_degree']:.1f}")
+    with col3:
+        st.metric("Coesão Interna", f"{row['cohesion']:.2f}" if not np.isnan(row['cohesion']) else "N/A")
+    with col4:
+        st.metric("Condutância", f"{row['conductance']:.2f}" if not np.isnan(row['conductance']) else "N/A")
+
+    # Routes between communities (diagonal: routes inside each community)
+    st.markdown("### Conexões entre Comunidades")
+    order = linked['community'].to_numpy()[:MATRIX_COMMUNITIES]
+    if len(order) < len(stats):
+        st.caption(f"Mostrando as {len(order)} maiores comunidades com rotas de {len(stats)}.")
+
+    fig_matrix = armazem.figure(
+        ('comunidades.matrix', view.key, graph_br.fingerprint, min_connections),
+        lambda: build_matrix(links, order)
+    )
+    with medicao.stage("comunidades.matrix"):
+        st.plotly_chart(fig_matrix, use_container_width=True)
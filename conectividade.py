@@ -0,0 +1,234 @@
+import copy
+from collections import deque
+
+import numpy as np
+
+
+# Undirected view of a RouteGraph that supports removing and restoring single airports.
+# Components, the largest component, the edge count and the average clustering are kept
+# up to date incrementally: a removal or restore only touches the node's neighbourhood,
+# plus (for a removal that splits a component) the pieces split off from it. A state with
+# nothing removed is built once per graph and shared (see armazem.connectivity); each
+# rerun works on with_removed(), which shares the neighbour sets with it.
+class ConnectivityState:
+    def __init__(self, graph):
+        self.graph = graph
+        n = len(graph)
+        self.fingerprint = graph.fingerprint
+        self.neighbors = [set() for _ in range(n)]
+        self_loops = graph.src == graph.dst
+        for u, v in zip(graph.src[~self_loops].tolist(), graph.dst[~self_loops].tolist()):
+            self.neighbors[u].add(v)
+            self.neighbors[v].add(u)
+        self.has_loop = np.zeros(n, dtype=bool)
+        self.has_loop[graph.src[self_loops]] = True
+
+        self.active = np.ones(n, dtype=bool)
+        self.removed = set()
+        self.degree = np.array([len(nbrs) for nbrs in self.neighbors], dtype=np.int64)
+        self.triangles = np.zeros(n, dtype=np.int64)
+        for v in range(n):
+            nbrs = self.neighbors[v]
+            self.triangles[v] = sum(len(nbrs & self.neighbors[u]) for u in nbrs) // 2
+        self.clustering_sum = sum(self._clustering(v) for v in range(n))
+        self.edges = int(self.degree.sum() // 2 + self.has_loop.sum())
+
+        # Component label of every active node, with member sets per label
+        self.label = np.full(n, -1, dtype=np.int64)
+        self.members = {}
+        self.size_count = {}
+        self._next_label = 0
+        for v in range(n):
+            if self.label[v] < 0:
+                self._new_component(self._reach(v))
+        self.original_metrics = self.metrics()
+
+    def _clustering(self, v):
+        d = self.degree[v]
+        return 2.0 * self.triangles[v] / (d * (d - 1)) if d > 1 else 0.0
+
+    def _active_neighbors(self, v):
+        return [u for u in self.neighbors[v] if self.active[u]]
+
+    def _reach(self, v):
+        seen = {v}
+        queue = deque([v])
+        while queue:
+            for u in self._active_neighbors(queue.popleft()):
+                if u not in seen:
+                    seen.add(u)
+                    queue.append(u)
+        return seen
+
+    def _count_size(self, size, delta):
+        count = self.size_count.get(size, 0) + delta
+        if count:
+            self.size_count[size] = count
+        else:
+            self.size_count.pop(size, None)
+
+    def _new_component(self, nodes):
+        label = self._next_label
+        self._next_label += 1
+        self.members[label] = set(nodes)
+        self.label[list(nodes)] = label
+        self._count_size(len(nodes), 1)
+        return label
+
+    def _resize(self, label, nodes_out=(), nodes_in=()):
+        members = self.members[label]
+        self._count_size(len(members), -1)
+        members.difference_update(nodes_out)
+        members.update(nodes_in)
+        if members:
+            self._count_size(len(members), 1)
+        else:
+            del self.members[label]
+
+    # Adjusts degrees, triangles and clustering of v's neighbours for v (dis)appearing
+    def _update_triangles(self, v, nbrs, sign):
+        nbr_set = set(nbrs)
+        own = 0
+        for u in nbrs:
+            common = len(nbr_set & self.neighbors[u])
+            self.clustering_sum -= self._clustering(u)
+            self.triangles[u] += sign * common
+            self.degree[u] += sign
+            self.clustering_sum += self._clustering(u)
+            own += common
+        self.clustering_sum -= self._clustering(v)
+        self.degree[v] = len(nbrs) if sign > 0 else 0
+        self.triangles[v] = own // 2 if sign > 0 else 0
+        self.clustering_sum += self._clustering(v)
+
+    # Breadth-first searches from each neighbour run in lock step; searches that meet are
+    # merged. Every search that runs out of nodes is a separate piece; the last one left
+    # keeps the old label, so the work is bounded by the size of the pieces split off.
+    def _split(self, label, starts):
+        owner = {}
+        root = list(range(len(starts)))
+        queues = {}
+        seen = {}
+        for i, u in enumerate(starts):
+            owner[u] = i
+            queues[i] = deque([u])
+            seen[i] = [u]
+
+        def find(i):
+            while root[i] != i:
+                root[i] = root[root[i]]
+                i = root[i]
+            return i
+
+        pieces = []
+        while len(queues) > 1:
+            for i in list(queues):
+                if i not in queues:
+                    continue
+                queue = queues[i]
+                if not queue:
+                    pieces.append(seen.pop(i))
+                    del queues[i]
+                    continue
+                x = queue.popleft()
+                for y in self._active_neighbors(x):
+                    j = owner.get(y)
+                    if j is None:
+                        owner[y] = i
+                        queue.append(y)
+                        seen[i].append(y)
+                        continue
+                    j = find(j)
+                    if j != i:
+                        # Same piece: fold the smaller search into the larger one
+                        big, small = (i, j) if len(seen[i]) >= len(seen[j]) else (j, i)
+                        root[small] = big
+                        queues[big].extend(queues.pop(small))
+                        seen[big].extend(seen.pop(small))
+                        i = big
+                        queue = queues[i]
+                if len(queues) == 1:
+                    break
+
+        for nodes in pieces:
+            self._resize(label, nodes_out=nodes)
+            self._new_component(nodes)
+
+    def remove(self, airport_id):
+        v = int(self.graph.positions([airport_id])[0])
+        if v < 0 or not self.active[v]:
+            return
+        nbrs = self._active_neighbors(v)
+        self.active[v] = False
+        self.removed.add(airport_id)
+        self.edges -= len(nbrs) + int(self.has_loop[v])
+        self._update_triangles(v, nbrs, -1)
+
+        label = self.label[v]
+        self.label[v] = -1
+        self._resize(label, nodes_out=[v])
+        if len(nbrs) > 1:
+            self._split(label, nbrs)
+
+    def restore(self, airport_id):
+        v = int(self.graph.positions([airport_id])[0])
+        if v < 0 or self.active[v]:
+            return
+        self.active[v] = True
+        self.removed.discard(airport_id)
+        nbrs = self._active_neighbors(v)
+        self.edges += len(nbrs) + int(self.has_loop[v])
+        self._update_triangles(v, nbrs, 1)
+
+        # Join v and its neighbours' components, relabelling the smaller ones
+        labels = {int(self.label[u]) for u in nbrs}
+        if not labels:
+            self.label[v] = self._new_component([v])
+            return
+        keep = max(labels, key=lambda lbl: len(self.members[lbl]))
+        for lbl in labels - {keep}:
+            nodes = list(self.members[lbl])
+            self._resize(lbl, nodes_out=nodes)
+            self._resize(keep, nodes_in=nodes)
+            self.label[nodes] = keep
+        self._resize(keep, nodes_in=[v])
+        self.label[v] = keep
+
+    # Copy of this state with the airports in `removed` taken out. The neighbour sets, the
+    # loop flags and the original metrics are shared, and never changed by either state.
+    def with_removed(self, removed):
+        state = copy.copy(self)
+        state.active = self.active.copy()
+        state.removed = set(self.removed)
+        state.degree = self.degree.copy()
+        state.triangles = self.triangles.copy()
+        state.label = self.label.copy()
+        state.members = {label: set(nodes) for label, nodes in self.members.items()}
+        state.size_count = dict(self.size_count)
+        state.sync(removed)
+        return state
+
+    # Applies the removals and restores needed to match `removed`
+    def sync(self, removed):
+        removed = set(removed)
+        for airport_id in list(self.removed - removed):
+            self.restore(airport_id)
+        for airport_id in removed - self.removed:
+            self.remove(airport_id)
+
+    def metrics(self):
+        num_nodes = int(self.active.sum())
+        return {
+            'nodes': num_nodes,
+            'edges': self.edges,
+            'components': len(self.members),
+            'largest_component': max(self.size_count) if self.size_count else 0,
+            'avg_clustering': self.clustering_sum / num_nodes if num_nodes else 0
+        }
+
+    # In + out degree of every active airport in the remaining directed graph
+    def directed_degrees(self):
+        g = self.graph
+        alive = self.active[g.src] & self.active[g.dst]
+        counts = np.bincount(g.src[alive], minlength=len(g)) + np.bincount(g.dst[alive], minlength=len(g))
+        return dict(zip(g.node_ids[self.active].tolist(), counts[self.active].tolist()))
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+AIRPORT_COLUMNS = ["Airport ID","Name","City","Country","IATA","ICAO","Latitude","Longitude","Altitude","Timezone","DST","Database Timezone","Type","Source"]
+ROUTE_COLUMNS = ["Airline","Airline ID","Source airport","Source airport ID","Destination airport","Destination airport ID","Codeshare","Stops","Equipment"]
+
+AIRPORTS_FILE = "airports.dat"
+ROUTES_FILE = "routes.dat"
+
+# Cleaned tables are stored one .npy per column, so every column can be memory-mapped
+CACHE_DIR = ".cache"
+CACHE_FORMAT = 2
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_signature(path, previous=None):
+    stat = os.stat(path)
+    signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    # Only re-hash the file when its size or mtime moved
+    if previous and all(previous.get(k) == v for k, v in signature.items()):
+        signature["sha1"] = previous["sha1"]
+    else:
+        signature["sha1"] = _file_hash(path)
+    return signature
+
+
+def _read_meta(table_dir):
+    try:
+        with open(os.path.join(table_dir, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_table(df, table_dir, source_signature):
+    tmp_dir = table_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        entry = {"name": col, "file": f"{i}.npy"}
+        if values.dtype.kind in "iufb":
+            np.save(os.path.join(tmp_dir, entry["file"]), values.to_numpy())
+        else:
+            # Text columns become int32 codes (-1 for nulls) into a dictionary of the
+            # distinct strings, so loading only creates each string once
+            codes, uniques = pd.factorize(values)
+            np.save(os.path.join(tmp_dir, entry["file"]), codes.astype(np.int32))
+            entry["dictionary"] = f"{i}.dict.npy"
+            np.save(os.path.join(tmp_dir, entry["dictionary"]), np.asarray(uniques, dtype=object).astype(str))
+        columns.append(entry)
+
+    meta = {"format": CACHE_FORMAT, "source": source_signature, "rows": len(df), "columns": columns}
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(table_dir, ignore_errors=True)
+    os.replace(tmp_dir, table_dir)
+
+
+# Numeric columns stay read-only views of the memory-mapped files (copy=False); text
+# columns are decoded by taking their codes from the dictionary, with the text dtype
+# read_csv gives
+def _read_table(table_dir, meta):
+    data = {}
+    for entry in meta["columns"]:
+        values = np.load(os.path.join(table_dir, entry["file"]), mmap_mode="r")
+        if "dictionary" in entry:
+            dictionary = np.load(os.path.join(table_dir, entry["dictionary"]))
+            values = pd.Series(dictionary.astype(object)).array.take(np.asarray(values), allow_fill=True)
+        data[entry["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def _parse_airports(path):
+    airports = pd.read_csv(path, header=None)
+    airports.columns = AIRPORT_COLUMNS
+    return airports
+
+
+def _parse_routes(path):
+    routes = pd.read_csv(path, header=None)
+    routes.columns = ROUTE_COLUMNS
+
+    # Check data types and clean the data
+    routes = routes.dropna(subset=["Source airport ID", "Destination airport ID"])
+    routes["Source airport ID"] = pd.to_numeric(routes["Source airport ID"], errors='coerce')
+    routes["Destination airport ID"] = pd.to_numeric(routes["Destination airport ID"], errors='coerce')
+    routes = routes.dropna(subset=["Source airport ID", "Destination airport ID"])
+
+    # Convert to int after cleaning
+    routes["Source airport ID"] = routes["Source airport ID"].astype(int)
+    routes["Destination airport ID"] = routes["Destination airport ID"].astype(int)
+    return routes.reset_index(drop=True)
+
+
+def _load_cached(source, name, parse, base_dir):
+    table_dir = os.path.join(base_dir, CACHE_DIR, name)
+    path = os.path.join(base_dir, source)
+    meta = _read_meta(table_dir)
+    valid = meta is not None and meta.get("format") == CACHE_FORMAT
+
+    signature = _file_signature(path, meta["source"] if valid else None)
+    if valid and meta["source"]["sha1"] == signature["sha1"]:
+        if meta["source"] != signature:
+            # Touched but unchanged: keep the columns, refresh the stored stat
+            meta["source"] = signature
+            with open(os.path.join(table_dir, "meta.json"), "w") as f:
+                json.dump(meta, f)
+        return _read_table(table_dir, meta)
+
+    df = parse(path)
+    try:
+        _write_table(df, table_dir, signature)
+    except OSError:
+        # Read-only checkout: still serve the parsed table
+        pass
+    return df
+
+
+# Cleaned, typed airport and route tables, served from the columnar cache when it is fresh
+def load_tables(base_dir="."):
+    airports = _load_cached(AIRPORTS_FILE, "airports", _parse_airports, base_dir)
+    routes = _load_cached(ROUTES_FILE, "routes", _parse_routes, base_dir)
+    return airports, routes
+
+
+# Identifies the current contents of both source files; changes whenever either file does
+def dataset_version(base_dir="."):
+    parts = []
+    for source, name in [(AIRPORTS_FILE, "airports"), (ROUTES_FILE, "routes")]:
+        meta = _read_meta(os.path.join(base_dir, CACHE_DIR, name))
+        previous = meta["source"] if meta and meta.get("format") == CACHE_FORMAT else None
+        parts.append(_file_signature(os.path.join(base_dir, source), previous)["sha1"])
+    return ":".join(parts)
@@ -0,0 +1,230 @@
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+import grafo
+import medicao
+import paralelo
+from dados import CACHE_DIR
+
+# Marks unreachable pairs in the uint8 distance matrix (so hop counts go up to 254)
+UNREACHABLE = 255
+BFS_BATCH_SIZE = 256
+# Distance stores kept open and on disk (about 177 MB each for the world graph); the least
+# recently used are dropped past this
+MAX_STORES = 4
+
+_open = OrderedDict()
+# Per-store locks, held while a store is opened or built; _lock only guards the two dicts,
+# so lookups into open stores never wait for a build
+_opening = {}
+_lock = threading.Lock()
+
+
+def _bfs_with_predecessors(indptr, indices, sources):
+    n = len(indptr) - 1
+    dist = np.full(len(sources) * n, -1, dtype=np.int32)
+    pred = np.full(len(sources) * n, -1, dtype=np.int64)
+    frontier = np.arange(len(sources)) * n + sources
+    dist[frontier] = 0
+    level = 0
+    while len(frontier):
+        rows, nodes = np.divmod(frontier, n)
+        origin, targets = grafo.frontier_edges(indptr, indices, nodes)
+        reached = rows[origin] * n + targets
+        new = dist[reached] < 0
+        reached = reached[new]
+        pred[reached] = nodes[origin[new]]
+        frontier = grafo.sorted_unique(reached)
+        level += 1
+        dist[frontier] = level
+    return dist.reshape(len(sources), n), pred.reshape(len(sources), n)
+
+
+# Predecessors fit in int16 below 32k nodes, halving the matrix
+def _pred_dtype(n):
+    return np.int16 if n < np.iinfo(np.int16).max else np.int32
+
+
+def _write_rows(dist_out, pred_out, dist, pred, sources):
+    dist_out[sources] = np.where(dist < 0, UNREACHABLE, np.minimum(dist, UNREACHABLE - 1))
+    pred_out[sources] = pred
+
+
+def _fill_rows(indptr, indices, dist_path, pred_path, sources):
+    dist, pred = _bfs_with_predecessors(indptr, indices, sources)
+    dist_out = np.load(dist_path, mmap_mode="r+")
+    pred_out = np.load(pred_path, mmap_mode="r+")
+    _write_rows(dist_out, pred_out, dist, pred, sources)
+    dist_out.flush()
+    pred_out.flush()
+
+
+def _batches(n):
+    return [np.arange(i, min(i + BFS_BATCH_SIZE, n)) for i in range(0, n, BFS_BATCH_SIZE)]
+
+
+def _build(graph, directory, workers):
+    n = len(graph)
+    tmp_dir = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        os.makedirs(tmp_dir)
+        dist_path = os.path.join(tmp_dir, "dist.npy")
+        pred_path = os.path.join(tmp_dir, "pred.npy")
+        open_memmap(dist_path, mode="w+", dtype=np.uint8, shape=(n, n))
+        open_memmap(pred_path, mode="w+", dtype=_pred_dtype(n), shape=(n, n))
+
+        paralelo.map_tasks(
+            _fill_rows, (graph.indptr, graph.indices, dist_path, pred_path), _batches(n), workers,
+            parallel=n >= paralelo.MIN_PARALLEL_NODES,
+        )
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_dir, directory)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+# The matrices as plain in-memory arrays, for when the cache directory cannot be written
+def _build_in_memory(graph):
+    n = len(graph)
+    dist_out = np.empty((n, n), dtype=np.uint8)
+    pred_out = np.empty((n, n), dtype=_pred_dtype(n))
+    for sources in _batches(n):
+        dist, pred = _bfs_with_predecessors(graph.indptr, graph.indices, sources)
+        _write_rows(dist_out, pred_out, dist, pred, sources)
+    return dist_out, pred_out
+
+
+# Removes the stores under `root` past the MAX_STORES most recently used, keeping `current`
+def _evict(root, current):
+    stores = [entry for entry in os.scandir(root) if entry.is_dir() and not entry.name.endswith(".tmp")]
+    stores.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    kept = 1
+    for entry in stores:
+        if entry.name == current:
+            continue
+        if kept < MAX_STORES:
+            kept += 1
+        else:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+# All-pairs hop distances of a RouteGraph with predecessors for path reconstruction,
+# memory-mapped from .cache/distancias/<key>/. Rows and columns follow node_ids, the
+# node order of the graph the store was built from.
+class HopDistances:
+    def __init__(self, node_ids, dist, pred):
+        self.node_ids = node_ids
+        self._index = pd.Index(node_ids)
+        self.dist = dist
+        self.pred = pred
+        self._eccentricity = None
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def _pos(self, airport_id):
+        pos = int(self._index.get_indexer([airport_id])[0])
+        if pos < 0:
+            raise KeyError(airport_id)
+        return pos
+
+    # Number of flights from src to dst, or None if dst cannot be reached
+    def distance(self, src_id, dst_id):
+        d = int(self.dist[self._pos(src_id), self._pos(dst_id)])
+        return None if d == UNREACHABLE else d
+
+    # Airport IDs of a shortest path, walked back through the predecessor row in O(length)
+    def path(self, src_id, dst_id):
+        s, v = self._pos(src_id), self._pos(dst_id)
+        if self.dist[s, v] == UNREACHABLE:
+            return None
+        row = self.pred[s]
+        path = [v]
+        while v != s:
+            v = int(row[v])
+            path.append(v)
+        return self.node_ids[path[::-1]].tolist()
+
+    # Hop counts from one airport to every node (UNREACHABLE where there is no path)
+    def distances_from(self, src_id):
+        return np.asarray(self.dist[self._pos(src_id)])
+
+    # Largest finite hop count from each airport to the airports it can reach
+    def eccentricity(self):
+        if self._eccentricity is None:
+            ecc = np.zeros(len(self), dtype=np.uint8)
+            for start in range(0, len(ecc), BFS_BATCH_SIZE):
+                block = np.asarray(self.dist[start:start + BFS_BATCH_SIZE])
+                ecc[start:start + len(block)] = np.where(block == UNREACHABLE, 0, block).max(axis=1, initial=0)
+            self._eccentricity = ecc
+        return self._eccentricity
+
+    def diameter(self):
+        ecc = self.eccentricity()
+        return int(ecc.max()) if len(ecc) else 0
+
+
+# Key of the store of a graph: the matrices are positional, so besides the routes (the
+# order-independent fingerprint) the key covers the order of the nodes
+def store_key(graph):
+    order = hashlib.sha1(np.ascontiguousarray(graph.node_ids, dtype=np.int64).tobytes()).hexdigest()
+    return f"{graph.fingerprint}-{order[:16]}"
+
+
+# Loads the store under root/key, building it first if it is not on disk
+def _open_store(graph, root, key, workers):
+    directory = os.path.join(root, key)
+    dist_path = os.path.join(directory, "dist.npy")
+    pred_path = os.path.join(directory, "pred.npy")
+    try:
+        if os.path.exists(dist_path) and os.path.exists(pred_path):
+            os.utime(directory)
+        else:
+            _build(graph, directory, workers)
+        _evict(root, key)
+    except OSError:
+        # Read-only checkout: use a complete store if there is one, otherwise keep the
+        # matrices in memory
+        if not (os.path.exists(dist_path) and os.path.exists(pred_path)):
+            return HopDistances(graph.node_ids.copy(), *_build_in_memory(graph))
+    return HopDistances(graph.node_ids.copy(), np.load(dist_path, mmap_mode="r"), np.load(pred_path, mmap_mode="r"))
+
+
+# Opens the distance store of a graph, building it (BFS from every node across a
+# process pool) the first time it is needed
+@medicao.timed()
+def hop_distances(graph, workers=None, base_dir="."):
+    key = store_key(graph)
+    root = os.path.join(base_dir, CACHE_DIR, "distancias")
+    directory = os.path.join(root, key)
+    with _lock:
+        if directory in _open:
+            _open.move_to_end(directory)
+            return _open[directory]
+        opening = _opening.setdefault(directory, threading.Lock())
+
+    with opening:
+        with _lock:
+            # Opened by another caller while this one waited
+            if directory in _open:
+                return _open[directory]
+        try:
+            store = _open_store(graph, root, key, workers)
+            with _lock:
+                _open[directory] = store
+                while len(_open) > MAX_STORES:
+                    _open.popitem(last=False)
+            return store
+        finally:
+            with _lock:
+                _opening.pop(directory, None)
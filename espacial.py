@@ -0,0 +1,143 @@
+import heapq
+import math
+import re
+
+import numpy as np
+
+import geo
+
+# Most points kept in a leaf of the KD-tree
+LEAF_SIZE = 8
+
+_COORDINATES = re.compile(r"^\s*([-+]?\d+(?:\.\d+)?)\s*[,;\s]\s*([-+]?\d+(?:\.\d+)?)\s*$")
+
+
+# "lat, lon" in decimal degrees as (lat, lon), or None when the text is not a valid pair
+def parse_coordinates(text):
+    match = _COORDINATES.match(text or "")
+    if not match:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=1)
+
+
+def _unit_vector(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    return [math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)]
+
+
+# Straight-line distance through the unit sphere for a great-circle distance, and back
+def _chord(km):
+    return 2 * math.sin(min(km / geo.EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def _arc_km(chord):
+    return 2 * geo.EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+# KD-tree over airport positions as unit vectors, so the chord (Euclidean) distance orders
+# points as the great-circle distance does and there is no seam at the antimeridian or the
+# poles. Airports without coordinates are left out. Queries walk plain lists, which is
+# faster than numpy for the handful of points a query looks at.
+class SpatialIndex:
+    def __init__(self, airports):
+        lat = airports['Latitude'].to_numpy(dtype=float)
+        lon = airports['Longitude'].to_numpy(dtype=float)
+        known = ~(np.isnan(lat) | np.isnan(lon))
+        ids = airports['Airport ID'].to_numpy()[known]
+        points = _unit_vectors(lat[known], lon[known])
+
+        order = np.arange(len(points))
+        # Node arrays: split axis and value, children (-1 for a leaf) and the leaf's slice of order
+        self._axis, self._split, self._left, self._right, self._start, self._end = [], [], [], [], [], []
+        stack = [(self._new_node(0, len(points)), 0, len(points))] if len(points) else []
+        while stack:
+            node, start, end = stack.pop()
+            if end - start <= LEAF_SIZE:
+                continue
+            part = points[order[start:end]]
+            axis = int(np.argmax(part.max(axis=0) - part.min(axis=0)))
+            mid = (start + end) // 2
+            order[start:end] = order[start:end][np.argpartition(part[:, axis], mid - start)]
+            self._axis[node] = axis
+            self._split[node] = float(points[order[mid], axis])
+            self._left[node] = self._new_node(start, mid)
+            self._right[node] = self._new_node(mid, end)
+            stack.append((self._left[node], start, mid))
+            stack.append((self._right[node], mid, end))
+
+        self._points = points[order].tolist()
+        self._ids = ids[order].tolist()
+
+    def _new_node(self, start, end):
+        self._axis.append(0)
+        self._split.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._start.append(start)
+        self._end.append(end)
+        return len(self._axis) - 1
+
+    def __len__(self):
+        return len(self._ids)
+
+    # The k airports closest to (lat, lon) as [(airport_id, km)], closest first
+    def nearest(self, lat, lon, k=1):
+        if not self._ids:
+            return []
+        q = _unit_vector(lat, lon)
+        best = []  # max-heap of (-squared chord, point)
+        # (node, squared distance from q to the node's side of its parent's split)
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if len(best) == k and bound > -best[0][0]:
+                continue
+            if self._left[node] < 0:
+                for i in range(self._start[node], self._end[node]):
+                    x, y, z = self._points[i]
+                    d2 = (x - q[0]) ** 2 + (y - q[1]) ** 2 + (z - q[2]) ** 2
+                    if len(best) < k:
+                        heapq.heappush(best, (-d2, i))
+                    elif d2 < -best[0][0]:
+                        heapq.heapreplace(best, (-d2, i))
+                continue
+            diff = q[self._axis[node]] - self._split[node]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            # Far side first on the stack, so the near side is searched first
+            stack.append((far, max(bound, diff * diff)))
+            stack.append((near, bound))
+        return [(self._ids[i], _arc_km(math.sqrt(-d2))) for d2, i in sorted(best, reverse=True)]
+
+    # Airports within radius_km of (lat, lon) as [(airport_id, km)], closest first
+    def within(self, lat, lon, radius_km):
+        if not self._ids:
+            return []
+        q = _unit_vector(lat, lon)
+        chord = _chord(radius_km)
+        limit = chord * chord
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._left[node] < 0:
+                for i in range(self._start[node], self._end[node]):
+                    x, y, z = self._points[i]
+                    d2 = (x - q[0]) ** 2 + (y - q[1]) ** 2 + (z - q[2]) ** 2
+                    if d2 <= limit:
+                        found.append((d2, i))
+                continue
+            # Left holds coordinates <= split and right >= split along the node's axis
+            diff = q[self._axis[node]] - self._split[node]
+            if diff <= chord:
+                stack.append(self._left[node])
+            if -diff <= chord:
+                stack.append(self._right[node])
+        return [(self._ids[i], _arc_km(math.sqrt(d2))) for d2, i in sorted(found)]
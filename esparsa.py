@@ -0,0 +1,104 @@
+import numpy as np
+import networkx as nx
+
+import grafo
+import paralelo
+
+# Sources per batched BFS in closeness
+BFS_BATCH_SIZE = 256
+
+
+# y = A^T x for the CSR adjacency: every node receives the values of its predecessors,
+# scaled by the edge weights when given
+def _spread(graph, x, weights=None):
+    values = x[graph.src] if weights is None else x[graph.src] * weights
+    return np.bincount(graph.dst, weights=values, minlength=len(graph))
+
+
+# Edge weights from a column of graph.edge_table ('routes', 'airlines', ...); None: unweighted
+def _edge_weights(graph, weight):
+    return None if weight is None else graph.edge_table[weight].to_numpy(dtype=float)
+
+
+def _as_dict(graph, values):
+    return dict(zip(graph.node_ids.tolist(), values.tolist()))
+
+
+# Same iteration as networkx.eigenvector_centrality: x <- (A^T + I) x, L2-normalized
+def eigenvector_centrality(graph, max_iter=1000, tol=1.0e-6, weight=None):
+    n = len(graph)
+    weights = _edge_weights(graph, weight)
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        xlast = x
+        x = xlast + _spread(graph, xlast, weights)
+        x /= np.linalg.norm(x) or 1.0
+        if np.abs(x - xlast).sum() < n * tol:
+            return _as_dict(graph, x)
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+# Same iteration as networkx.pagerank with uniform teleport and dangling redistribution
+def pagerank(graph, alpha=0.85, max_iter=100, tol=1.0e-6, weight=None):
+    n = len(graph)
+    weights = _edge_weights(graph, weight)
+    out_degree = np.bincount(graph.src, weights=weights, minlength=n).astype(float)
+    dangling = out_degree == 0
+    inv_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        xlast = x
+        x = alpha * (_spread(graph, xlast * inv_degree, weights) + xlast[dangling].sum() / n) + (1.0 - alpha) / n
+        if np.abs(x - xlast).sum() < n * tol:
+            return _as_dict(graph, x)
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+# Largest eigenvalue of A^T, estimated from the converged eigenvector iteration
+def spectral_radius(graph, max_iter=1000, tol=1.0e-6, weight=None):
+    x = np.array(list(eigenvector_centrality(graph, max_iter, tol, weight).values()))
+    return float(x @ _spread(graph, x, _edge_weights(graph, weight)) / (x @ x)) if x.any() else 0.0
+
+
+# Same iteration as networkx.katz_centrality (normalized). Without an explicit alpha the
+# attenuation is set below 1 / spectral radius so the series converges on any graph size.
+def katz_centrality(graph, alpha=None, beta=1.0, max_iter=1000, tol=1.0e-6, weight=None):
+    n = len(graph)
+    weights = _edge_weights(graph, weight)
+    if alpha is None:
+        radius = spectral_radius(graph, weight=weight)
+        alpha = 0.9 / radius if radius > 0 else 0.1
+
+    x = np.zeros(n)
+    for _ in range(max_iter):
+        xlast = x
+        x = alpha * _spread(graph, xlast, weights) + beta
+        if np.abs(x - xlast).sum() < n * tol:
+            x /= np.linalg.norm(x) or 1.0
+            return _as_dict(graph, x)
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def _closeness_batch(indptr, indices, sources):
+    n = len(indptr) - 1
+    dist = grafo.bfs_distances(indptr, indices, sources)
+    reached = (dist >= 0).sum(axis=1) - 1
+    total = np.where(dist > 0, dist, 0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(total > 0, reached / total, 0.0)
+    if n > 1:
+        value *= reached / (n - 1)
+    return value
+
+
+# networkx.closeness_centrality (incoming distances, wf_improved) from batched BFS on the
+# reversed CSR arrays; batches go to a process pool on larger graphs
+def closeness_centrality(graph, workers=None):
+    n = len(graph)
+    indptr, indices = graph.reverse_csr
+    batches = [np.arange(i, min(i + BFS_BATCH_SIZE, n)) for i in range(0, n, BFS_BATCH_SIZE)]
+    values = paralelo.map_tasks(
+        _closeness_batch, (indptr, indices), batches, workers, parallel=n >= paralelo.MIN_PARALLEL_NODES
+    )
+    return _as_dict(graph, np.concatenate(values) if values else np.zeros(0))
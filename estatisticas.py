@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+import grafo
+import medicao
+
+
+# Undirected edges (each pair once, u <= v) of the RouteGraph between the nodes in `keep`
+def undirected_edges(graph, keep):
+    alive = keep[graph.src] & keep[graph.dst]
+    u = np.minimum(graph.src[alive], graph.dst[alive])
+    v = np.maximum(graph.src[alive], graph.dst[alive])
+    pairs = grafo.sorted_unique(u * len(graph) + v)
+    return np.divmod(pairs, len(graph))
+
+
+# Community label of every node of the graph (-1 for nodes outside the partition)
+def label_array(graph, partition):
+    labels = np.full(len(graph), -1, dtype=np.int64)
+    labels[graph.positions(list(partition))] = list(partition.values())
+    return labels
+
+
+# Statistics of every community of an undirected edge list (u, v) and a label array,
+# from one pass over the edges. Returns a table with one row per community (size,
+# internal/external edges, cohesion = internal / (internal + external), conductance =
+# cut / min(volume, rest of the volume), degree max/mean/min) and the edge counts between
+# communities as a sparse table of the linked pairs only (source <= target; source ==
+# target holds the internal edges), since most communities of a sparse graph are isolated.
+@medicao.timed()
+def community_statistics(u, v, labels):
+    present = labels >= 0
+    k = int(labels.max()) + 1 if present.any() else 0
+    n = len(labels)
+    degree = np.bincount(u, minlength=n) + np.bincount(v, minlength=n)
+
+    lu, lv = labels[u], labels[v]
+    keys = np.sort(np.minimum(lu, lv) * k + np.maximum(lu, lv))
+    starts = np.flatnonzero(np.diff(keys, prepend=-1)) if len(keys) else np.zeros(0, dtype=np.int64)
+    pair_source, pair_target = np.divmod(keys[starts], max(k, 1))
+    pair_edges = np.diff(starts, append=len(keys))
+    links = pd.DataFrame({'source': pair_source, 'target': pair_target, 'edges': pair_edges})
+
+    inside = pair_source == pair_target
+    internal = np.bincount(pair_source[inside], weights=pair_edges[inside], minlength=k).astype(np.int64)
+    cut = np.bincount(pair_source[~inside], weights=pair_edges[~inside], minlength=k)
+    cut += np.bincount(pair_target[~inside], weights=pair_edges[~inside], minlength=k)
+    external = cut.astype(np.int64)
+    size = np.bincount(labels[present], minlength=k)
+    volume = np.bincount(labels[present], weights=degree[present], minlength=k)
+    rest = volume.sum() - volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cohesion = np.where(internal + external > 0, internal / (internal + external), np.nan)
+        conductance = np.where(np.minimum(volume, rest) > 0, external / np.minimum(volume, rest), np.nan)
+
+    max_degree = np.zeros(k, dtype=np.int64)
+    min_degree = np.zeros(k, dtype=np.int64)
+    np.maximum.at(max_degree, labels[present], degree[present])
+    min_degree[:] = degree.max(initial=0)
+    np.minimum.at(min_degree, labels[present], degree[present])
+
+    table = pd.DataFrame({
+        'community': np.arange(k),
+        'size': size,
+        'internal_edges': internal,
+        'external_edges': external,
+        'cohesion': cohesion,
+        'conductance': conductance,
+        'max_degree': max_degree,
+        'mean_degree': np.divide(volume, size, out=np.zeros(k), where=size > 0),
+        'min_degree': min_degree,
+    })
+    return table, links
+
+
+# Dense matrix of edge counts between `communities` (both directions filled in), from the
+# sparse links of community_statistics
+def link_matrix(links, communities):
+    position = pd.Index(communities)
+    matrix = np.zeros((len(position), len(position)), dtype=np.int64)
+    source = position.get_indexer(links['source'])
+    target = position.get_indexer(links['target'])
+    shown = (source >= 0) & (target >= 0)
+    matrix[source[shown], target[shown]] = links['edges'].to_numpy()[shown]
+    matrix[target[shown], source[shown]] = links['edges'].to_numpy()[shown]
+    return matrix
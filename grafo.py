@@ -0,0 +1,260 @@
+import hashlib
+from functools import cached_property
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+import espacial
+import geo
+
+
+# Directed route graph over a fixed airport table. Node i of the CSR arrays is row i of
+# `airports`; `indices[indptr[i]:indptr[i + 1]]` are the positions reachable from it.
+class RouteGraph:
+    def __init__(self, airports, G, node_ids, src, dst, route_src=None, route_dst=None, routes=None):
+        self.airports = airports
+        self.G = G
+        self.node_ids = node_ids
+        # Unique directed edges as node positions, sorted by source
+        self.src = src
+        self.dst = dst
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=len(node_ids)))))
+        self.indices = dst
+        # Route table the graph was built from, and the endpoint positions of each row
+        self.routes = routes
+        self.route_src = route_src
+        self.route_dst = route_dst
+        # Airport rows addressable by ID; aligned with the node positions
+        self.by_id = airports.set_index("Airport ID", drop=False)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    # CSR of the reversed graph: `in_indices[in_indptr[i]:in_indptr[i + 1]]` point into node i
+    @cached_property
+    def reverse_csr(self):
+        order = np.argsort(self.dst, kind="stable")
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(self.dst, minlength=len(self)))))
+        return indptr, self.src[order]
+
+    # Great-circle length in km of every edge, aligned with src/dst
+    @cached_property
+    def edge_km(self):
+        lat = self.airports["Latitude"].to_numpy(dtype=float)
+        lon = self.airports["Longitude"].to_numpy(dtype=float)
+        return geo.haversine_km(lat[self.src], lon[self.src], lat[self.dst], lon[self.dst])
+
+    # Route rows aggregated per CSR edge (see edge_table below)
+    @cached_property
+    def edge_table(self):
+        return edge_table(self)
+
+    # Airports and route rows ordered by degree, for degree-threshold filters
+    @cached_property
+    def degree_index(self):
+        return DegreeIndex(self)
+
+    # KD-tree over the airport coordinates for nearest-airport and radius queries
+    @cached_property
+    def spatial_index(self):
+        return espacial.SpatialIndex(self.airports)
+
+    # Hash of the node set and the edge set, independent of node order
+    @cached_property
+    def fingerprint(self):
+        edges = np.stack([self.node_ids[self.src], self.node_ids[self.dst]], axis=1)
+        edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+        digest = hashlib.sha1()
+        digest.update(np.sort(self.node_ids).astype(np.int64).tobytes())
+        digest.update(edges.astype(np.int64).tobytes())
+        return digest.hexdigest()
+
+    def positions(self, ids):
+        return self.by_id.index.get_indexer(np.asarray(ids))
+
+    # Per-node table with an Airport_ID column plus the requested airport columns, in the
+    # order of `ids`; IDs missing from the airport table are dropped
+    def node_table(self, ids, columns):
+        ids = np.asarray(list(ids), dtype=np.int64)
+        pos = self.positions(ids)
+        found = pos >= 0
+        table = self.airports.iloc[pos[found]][list(columns)].reset_index(drop=True)
+        table.insert(0, "Airport_ID", ids[found])
+        return table
+
+    # Induced subgraph on the nodes where `mask` is True, without touching networkx edges one by one
+    def subgraph(self, mask):
+        mask = np.asarray(mask, dtype=bool)
+        new_pos = np.full(len(self) + 1, -1, dtype=np.int64)  # slot -1 absorbs unknown endpoints
+        new_pos[:-1][mask] = np.arange(mask.sum())
+
+        keep = mask[self.src] & mask[self.dst]
+        src, dst = new_pos[self.src[keep]], new_pos[self.dst[keep]]
+        node_ids = self.node_ids[mask]
+
+        G = nx.DiGraph()
+        G.add_nodes_from((i, self.G.nodes[i]) for i in node_ids.tolist())
+
+        route_src = route_dst = None
+        if self.route_src is not None:
+            route_src, route_dst = new_pos[self.route_src], new_pos[self.route_dst]
+        graph = RouteGraph(self.airports[mask], G, node_ids, src, dst, route_src, route_dst, self.routes)
+        graph.edge_km = self.edge_km[keep]
+        _add_edges(graph)
+        return graph
+
+    # Rows of `routes` (the table passed to build_graph) with both endpoints in the graph
+    def route_mask(self):
+        return (self.route_src >= 0) & (self.route_dst >= 0)
+
+    # CSR edge index of each route row (-1 for rows outside the graph)
+    def route_edges(self):
+        n = len(self)
+        inside = self.route_mask()
+        keys = self.src * n + self.dst
+        route_keys = np.where(inside, self.route_src * n + self.route_dst, -1)
+        edge = np.searchsorted(keys, route_keys)
+        return np.where(inside, edge, -1)
+
+
+# Airports sorted by degree (in + out, as G.degree()) and route rows sorted by the smaller
+# degree of their endpoints, both descending: the airports with degree >= t, and the routes
+# between them, are a prefix found by binary search. Ties keep the airport table order.
+class DegreeIndex:
+    def __init__(self, graph):
+        self.graph = graph
+        self.degree = np.diff(graph.indptr) + np.bincount(graph.dst, minlength=len(graph))
+        self.node_order = np.argsort(-self.degree, kind="stable")
+        # Negated so the keys are ascending for searchsorted
+        self._node_keys = -self.degree[self.node_order]
+
+        inside = np.flatnonzero(graph.route_mask())
+        route_degree = np.minimum(self.degree[graph.route_src[inside]], self.degree[graph.route_dst[inside]])
+        order = np.argsort(-route_degree, kind="stable")
+        self.route_rows = inside[order]
+        self._route_keys = -route_degree[order]
+
+    # Number of airports with degree >= threshold
+    def count(self, threshold):
+        return int(np.searchsorted(self._node_keys, -threshold, side="right"))
+
+    # Rows of graph.airports with degree >= threshold, highest degree first, with a Degree column
+    def airports(self, threshold):
+        positions = self.node_order[:self.count(threshold)]
+        table = self.graph.airports.iloc[positions]
+        return table.assign(Degree=self.degree[positions])
+
+    # IDs of the airports with degree >= threshold, in table (and G) order
+    def node_ids(self, threshold):
+        return self.graph.node_ids[np.sort(self.node_order[:self.count(threshold)])]
+
+    # Rows of graph.routes between airports with degree >= threshold
+    def routes(self, threshold):
+        end = int(np.searchsorted(self._route_keys, -threshold, side="right"))
+        return self.graph.routes.iloc[self.route_rows[:end]]
+
+
+# One row per CSR edge (aligned with src/dst) aggregating the route rows behind it:
+# rows ('routes'), distinct airlines, codeshare rows and distinct aircraft types
+def edge_table(graph):
+    m = len(graph.src)
+    inside = graph.route_mask()
+    edge = graph.route_edges()[inside]
+    routes = graph.routes[inside]
+    airline, _ = pd.factorize(routes["Airline"].fillna(""))
+    equipment = routes["Equipment"].fillna("").str.split()
+    equipment_code, _ = pd.factorize(equipment.explode().dropna())
+    equipment_edge = np.repeat(edge, equipment.str.len().to_numpy())
+    return pd.DataFrame({
+        "Source airport ID": graph.node_ids[graph.src],
+        "Destination airport ID": graph.node_ids[graph.dst],
+        "km": graph.edge_km,
+        "routes": np.bincount(edge, minlength=m),
+        "airlines": _distinct_counts(edge, airline, m),
+        "codeshares": np.bincount(edge[(routes["Codeshare"] == "Y").to_numpy()], minlength=m),
+        "equipment": _distinct_counts(equipment_edge, equipment_code, m),
+    })
+
+
+# Positions of each route endpoint in `node_ids`; -1 where the airport is unknown
+def _route_positions(node_ids, routes):
+    index = pd.Index(node_ids)
+    src = index.get_indexer(routes["Source airport ID"].to_numpy())
+    dst = index.get_indexer(routes["Destination airport ID"].to_numpy())
+    return src, dst
+
+
+# Number of distinct `values` per group, for int groups in [0, count)
+def _distinct_counts(groups, values, count):
+    width = int(values.max()) + 1 if len(values) else 1
+    keys = sorted_unique(groups.astype(np.int64) * width + values)
+    return np.bincount(keys // width, minlength=count)
+
+
+# Adds the CSR edges to the networkx graph, with the great-circle length as 'distance'
+def _add_edges(graph):
+    ids = graph.node_ids
+    graph.G.add_edges_from(zip(
+        ids[graph.src].tolist(),
+        ids[graph.dst].tolist(),
+        ({"distance": km} for km in graph.edge_km.tolist()),
+    ))
+
+
+def _unique_edges(src, dst, n):
+    keep = (src >= 0) & (dst >= 0)
+    keys = np.unique(src[keep].astype(np.int64) * n + dst[keep])
+    return (keys // n).astype(np.int64), (keys % n).astype(np.int64)
+
+
+# Builds the networkx graph and its CSR adjacency in one pass over the ID arrays
+def build_graph(airports, routes):
+    node_ids = airports["Airport ID"].to_numpy().astype(np.int64)
+    n = len(node_ids)
+    route_src, route_dst = _route_positions(node_ids, routes)
+    src, dst = _unique_edges(route_src, route_dst, n)
+
+    G = nx.DiGraph()
+    G.add_nodes_from(zip(node_ids.tolist(), airports.to_dict("records")))
+    graph = RouteGraph(airports, G, node_ids, src, dst, route_src, route_dst, routes)
+    _add_edges(graph)
+    return graph
+
+
+# np.unique for integer keys via a plain sort (faster than the hash-based np.unique)
+def sorted_unique(keys):
+    keys = np.sort(keys)
+    if len(keys) > 1:
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys
+
+
+# Out-edges of `nodes` in a CSR graph: for each edge, the index into `nodes` it came from
+# and its target
+def frontier_edges(indptr, indices, nodes):
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    origin = np.repeat(np.arange(len(nodes)), counts)
+    # Edge slot = position in the concatenated output, shifted to the node's CSR row
+    shift = starts - (np.cumsum(counts) - counts)
+    return origin, indices[np.arange(counts.sum()) + shift[origin]]
+
+
+# Hop distances from each of `sources` (one row per source, -1 if unreachable), with all
+# the BFS runs of the batch advancing one level at a time
+def bfs_distances(indptr, indices, sources):
+    n = len(indptr) - 1
+    sources = np.asarray(sources)
+    dist = np.full(len(sources) * n, -1, dtype=np.int32)
+    frontier = np.arange(len(sources)) * n + sources
+    dist[frontier] = 0
+    level = 0
+    while len(frontier):
+        rows, nodes = np.divmod(frontier, n)
+        origin, targets = frontier_edges(indptr, indices, nodes)
+        reached = rows[origin] * n + targets
+        frontier = sorted_unique(reached[dist[reached] < 0])
+        level += 1
+        dist[frontier] = level
+    return dist.reshape(len(sources), n)
@@ -0,0 +1,71 @@
+import numpy as np
+
+import grafo
+import paralelo
+
+# Sources processed together by one level-synchronous Brandes pass
+BATCH_SIZE = 32
+
+
+def _batch_dependencies(indptr, indices, sources):
+    n = len(indptr) - 1
+    b = len(sources)
+    dist = np.full(b * n, -1, dtype=np.int32)
+    sigma = np.zeros(b * n)
+
+    # Flat (source, node) keys; forward BFS runs for every source of the batch at once
+    frontier = np.arange(b) * n + sources
+    dist[frontier] = 0
+    sigma[frontier] = 1.0
+    levels = []
+    level = 0
+    while len(frontier):
+        rows, nodes = np.divmod(frontier, n)
+        pair, targets = grafo.frontier_edges(indptr, indices, nodes)
+        parents = frontier[pair]
+        children = rows[pair] * n + targets
+        new = dist[children] < 0
+        parents, children = parents[new], children[new]
+        if not len(children):
+            break
+        # Path counts of the next level; these edges form the shortest-path DAG
+        sigma += np.bincount(children, weights=sigma[parents], minlength=b * n)
+        frontier = grafo.sorted_unique(children)
+        level += 1
+        dist[frontier] = level
+        levels.append((parents, children))
+
+    # Backward pass: dependencies flow from the deepest level up the DAG
+    delta = np.zeros(b * n)
+    for parents, children in reversed(levels):
+        share = sigma[parents] / sigma[children] * (1.0 + delta[children])
+        delta += np.bincount(parents, weights=share, minlength=b * n)
+
+    delta[np.arange(b) * n + sources] = 0.0
+    return delta.reshape(b, n).sum(axis=0)
+
+
+# Exact (unsampled) betweenness of every node of a CSR digraph, normalized like
+# networkx.betweenness_centrality. Source batches are spread over a process pool and
+# their partial dependency vectors summed in batch order, so the result does not
+# depend on the number of workers.
+def betweenness(indptr, indices, workers=None):
+    n = len(indptr) - 1
+    batches = [np.arange(i, min(i + BATCH_SIZE, n)) for i in range(0, n, BATCH_SIZE)]
+    partials = paralelo.map_tasks(
+        _batch_dependencies, (np.asarray(indptr), np.asarray(indices)), batches, workers,
+        parallel=n >= paralelo.MIN_PARALLEL_NODES,
+    )
+
+    bc = np.zeros(n)
+    for partial in partials:
+        bc += partial
+    if n > 2:
+        bc /= (n - 1) * (n - 2)
+    return bc
+
+
+# Betweenness of a RouteGraph as {airport_id: value}
+def betweenness_centrality(graph, workers=None):
+    bc = betweenness(graph.indptr, graph.indices, workers)
+    return dict(zip(graph.node_ids.tolist(), bc.tolist()))
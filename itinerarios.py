@@ -0,0 +1,127 @@
+import heapq
+import weakref
+
+import numpy as np
+import pandas as pd
+
+import busca
+import medicao
+
+_indexes = weakref.WeakKeyDictionary()
+
+
+# Airline and equipment annotations of the CSR edges of a RouteGraph, taken from the
+# route rows behind each edge. Rows are kept sorted by edge so the rows of one edge are
+# a contiguous slice; equipment is stored as (row, code) pairs since a route lists
+# every aircraft type flown on it, separated by spaces.
+class EdgeIndex:
+    def __init__(self, graph):
+        routes = graph.routes[graph.route_mask()]
+        edge = graph.route_edges()[graph.route_mask()]
+        order = np.argsort(edge, kind='stable')
+        routes = routes.iloc[order]
+        self.row_edge = edge[order]
+        self.row_bounds = np.searchsorted(self.row_edge, np.arange(len(graph.src) + 1))
+
+        self.airline_code, self.airlines = pd.factorize(routes['Airline'].fillna(''), sort=True)
+        equipment = routes['Equipment'].fillna('').str.split()
+        self.equipment_row = np.repeat(np.arange(len(routes)), equipment.str.len().to_numpy())
+        self.equipment_code, self.equipment = pd.factorize(equipment.explode().dropna(), sort=True)
+
+        # Plain lists: the searches read them one element at a time
+        self.indptr = graph.indptr.tolist()
+        self.indices = graph.indices.tolist()
+        self.km = graph.edge_km.tolist()
+        self.hops = [1.0] * len(self.indices)
+
+    # Route rows operated by one of `airlines` with one of `equipment` (None: any)
+    def rows_allowed(self, airlines=None, equipment=None):
+        ok = np.ones(len(self.row_edge), dtype=bool)
+        if airlines is not None:
+            ok &= np.isin(self.airline_code, self.airlines.get_indexer(list(airlines)))
+        if equipment is not None:
+            flown = np.isin(self.equipment_code, self.equipment.get_indexer(list(equipment)))
+            ok &= np.bincount(self.equipment_row[flown], minlength=len(ok)) > 0
+        return ok
+
+    # Edges with at least one allowed route row
+    def edges_allowed(self, rows_ok):
+        return np.bincount(self.row_edge[rows_ok], minlength=len(self.indices)) > 0
+
+    # Airline codes of the allowed rows of one edge
+    def edge_airlines(self, edge, rows_ok):
+        start, end = self.row_bounds[edge], self.row_bounds[edge + 1]
+        codes = self.airline_code[start:end][rows_ok[start:end]]
+        return self.airlines[np.unique(codes)].tolist()
+
+
+# Edge index of a graph, built on first use and kept while the graph is alive
+def edge_index(graph):
+    index = _indexes.get(graph)
+    if index is None:
+        index = _indexes[graph] = EdgeIndex(graph)
+    return index
+
+
+# Up to k loopless itineraries from src_id to dst_id in increasing cost (Yen's algorithm),
+# by great-circle distance (weight='km') or number of flights (weight='hops'). Only legs
+# flown by one of `airlines` with one of `equipment` are used (None: no restriction).
+# Each itinerary is a dict with the airport IDs, total km, number of legs and the
+# airlines that can fly each leg.
+@medicao.timed()
+def k_shortest_paths(graph, src_id, dst_id, k=10, weight='km', airlines=None, equipment=None):
+    src, dst = (int(p) for p in graph.positions([src_id, dst_id]))
+    if src < 0 or dst < 0:
+        raise KeyError(src_id if src < 0 else dst_id)
+
+    index = edge_index(graph)
+    rows_ok = index.rows_allowed(airlines, equipment)
+    edge_ok = index.edges_allowed(rows_ok).tolist()
+    hops = busca.hop_heuristic(graph, dst)
+    if weight == 'km':
+        weights = index.km
+        heuristic = np.where(np.isinf(hops), np.inf, busca.distance_heuristic(graph, dst)).tolist()
+    else:
+        weights = index.hops
+        heuristic = hops
+
+    def shortest(start, blocked_nodes=(), blocked_edges=()):
+        return busca.search(index.indptr, index.indices, weights, heuristic, start, dst,
+                            edge_ok, blocked_nodes, blocked_edges)
+
+    first = shortest(src)
+    if first is None:
+        return []
+    paths = [first]
+    candidates = []
+    seen = {tuple(first[0])}
+    while len(paths) < k:
+        nodes, edges, _ = paths[-1]
+        root_cost = 0.0
+        for i in range(len(nodes) - 1):
+            # Deviate at nodes[i]: the root up to it is kept, the next edge of every known
+            # path sharing that root is blocked, and the root may not be revisited
+            root = nodes[:i + 1]
+            blocked_edges = {p_edges[i] for p_nodes, p_edges, _ in paths if p_nodes[:i + 1] == root}
+            spur = shortest(nodes[i], set(root[:-1]), blocked_edges)
+            if spur is not None:
+                spur_nodes, spur_edges, spur_cost = spur
+                candidate = root[:-1] + spur_nodes
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heapq.heappush(candidates, (root_cost + spur_cost, len(candidate), candidate, edges[:i] + spur_edges))
+            root_cost += weights[edges[i]]
+        if not candidates:
+            break
+        cost, _, candidate, candidate_edges = heapq.heappop(candidates)
+        paths.append((candidate, candidate_edges, cost))
+
+    return [
+        {
+            'path': graph.node_ids[nodes].tolist(),
+            'km': sum(index.km[e] for e in edges),
+            'legs': len(edges),
+            'airlines': [index.edge_airlines(e, rows_ok) for e in edges],
+        }
+        for nodes, edges, _ in paths
+    ]
@@ -1,210 +1,208 @@
 import streamlit as st
 import plotly.graph_objects as go
-import numpy as np
 
-airports_br = st.session_state.airports_br
-routes_br = st.session_state.routes_br
+import armazem
+import camadas
+import medicao
 
-st.markdown("## Mapa Rotas Aéreas")
 
-# Interactive controls
-col1, col2, col3 = st.columns([1, 1, 1])
+# Route map of a region for the page's controls; a module-level function so the stage
+# benchmark builds exactly the figure the page shows
+def build_figure(view, min_connections, show_routes, route_opacity, color_by_degree, show_labels):
+    airports_br = view.airports
+    degree_index = view.graph.degree_index
+    filtered_airports = degree_index.airports(min_connections)
 
-with col1:
-    show_routes = st.checkbox("Mostrar Rotas", value=True)
-    route_opacity = st.slider("Opacidade das Rotas", 0.1, 1.0, 0.1, 0.1)
+    # Create enhanced plotly figure
+    fig = go.Figure()
 
-with col2:
-    min_connections = st.slider("Mín. Conexões por Aeroporto", 0, 80, 1)
-
-with col3:
-    color_by_degree = st.checkbox("Colorir por Grau de Conectividade", value=True)
-    show_labels = st.checkbox("Mostrar Labels", value=False)
-
-# Filter airports by minimum connections
-G_br = st.session_state.G_br
-airport_degrees = dict(G_br.degree())
-
-# Ensure Airport ID is integer type for proper mapping
-airports_br['Airport ID'] = airports_br['Airport ID'].astype(int)
-
-# Create a mapping with consistent integer keys
-degree_mapping = {int(k): v for k, v in airport_degrees.items()}
-
-filtered_airports = airports_br[
-    airports_br['Airport ID'].map(degree_mapping).fillna(0) >= min_connections
-].copy()
-
-# Create enhanced plotly figure
-fig = go.Figure()
-
-# Add airports with degree-based coloring
-if color_by_degree and not filtered_airports.empty:
-    degrees = [degree_mapping.get(aid, 0) for aid in filtered_airports['Airport ID']]
-    colors = degrees
-    colorbar_title = "Grau de Conectividade"
-else:
-    colors = '#1f77b4'  # Light blue instead of 'blue'
-    colorbar_title = None
-
-# Calculate marker sizes based on connections (degree)
-degrees = [degree_mapping.get(aid, 0) for aid in filtered_airports['Airport ID']]
-marker_sizes = []
-for deg in degrees:
-    if deg <= 10:
-        size = max(3, 3 + deg * 0.75)  # Linear scaling for low degrees (3-10)
+    # Add airports with degree-based coloring
+    if color_by_degree and not filtered_airports.empty:
+        colors = filtered_airports['Degree']
+        colorbar_title = "Grau de Conectividade"
     else:
-        size = max(10, min(25, 10 + (deg - 10) * 0.25))  # Reduced scaling for high degrees (10-25)
-    marker_sizes.append(size)
-
-fig.add_trace(go.Scattergeo(
-    lon=filtered_airports['Longitude'],
-    lat=filtered_airports['Latitude'],
-    text=filtered_airports['Name'] + '<br>Conexões: ' + filtered_airports['Airport ID'].map(degree_mapping).fillna(0).astype(str),
-    mode='markers+text' if show_labels else 'markers',
-    textfont=dict(size=8, color='#000000'),
-    textposition="top center",
-    marker=dict(
-        size=marker_sizes,
-        color=colors,
-        colorscale='Blues' if color_by_degree else None,
-        colorbar=dict(
-            title=dict(text=colorbar_title, font=dict(color='#000000')),
-            tickfont=dict(color='#000000')
-        ) if color_by_degree else None,
-        showscale=color_by_degree,
-        line=dict(width=2, color='#000000')
-    ),
-    name='Aeroportos',
-    hovertemplate='<b>%{text}</b><extra></extra>'
-))
-
-# Add routes if enabled
-if show_routes:
-    filtered_airport_ids = set(filtered_airports['Airport ID'])
-    filtered_routes = routes_br[
-        routes_br['Source airport ID'].isin(filtered_airport_ids) &
-        routes_br['Destination airport ID'].isin(filtered_airport_ids)
-    ]
-    
-    for _, row in filtered_routes.iterrows():
-        src = airports_br[airports_br['Airport ID'] == row['Source airport ID']]
-        dst = airports_br[airports_br['Airport ID'] == row['Destination airport ID']]
-        if not src.empty and not dst.empty:
-            fig.add_trace(go.Scattergeo(
-                lon=[src.iloc[0]['Longitude'], dst.iloc[0]['Longitude']],
-                lat=[src.iloc[0]['Latitude'], dst.iloc[0]['Latitude']],
-                mode='lines',
-                line=dict(width=1.2, color=f'rgba(0,0,0,{route_opacity})'),
-                showlegend=False,
-                hoverinfo='none'
-            ))
-
-# Enhanced layout
-fig.update_layout(
-    title={
-        'text': f'Rede Aérea Brasileira - {len(filtered_airports)} Aeroportos',
-        'x': 0.5,
-        'xanchor': 'center',
-        'font': {'color': '#000000', 'size': 20}
-    },
-    geo=dict(
-        scope='south america',
-        projection_type='natural earth',
-        showland=True,
-        landcolor='rgb(240, 240, 240)',
-        coastlinecolor='rgb(0, 0, 0)',
-        showocean=True,
-        oceancolor='rgb(255, 255, 255)',
-        showcountries=True,
-        countrycolor='rgb(0, 0, 0)',
-        center=dict(lat=-15, lon=-55),
-        projection_scale=1.2
-    ),
-    height=700,
-    showlegend=True,
-    plot_bgcolor='white',
-    paper_bgcolor='white',
-    font=dict(color='#000000')
-)
-
-st.plotly_chart(fig, use_container_width=True)
-
-# Add custom CSS to fix metric font colors
-st.markdown("""
-<style>
-/* Force all metric text to be black */
-[data-testid="metric-container"] {
-    background-color: white !important;
-    border: 1px solid #ddd !important;
-    padding: 1rem !important;
-    border-radius: 0.5rem !important;
-}
-
-[data-testid="metric-container"] * {
-    color: black !important;
-}
-
-[data-testid="metric-container"] label {
-    color: #666 !important;
-    font-size: 14px !important;
-}
-
-[data-testid="metric-container"] div[data-testid="metric-value"] {
-    color: black !important;
-    font-size: 24px !important;
-    font-weight: 600 !important;
-}
-
-/* Alternative selectors for metric values */
-.metric-container .metric-value {
-    color: black !important;
-}
-
-div[class*="metric"] {
-    color: black !important;
-}
-</style>
-""", unsafe_allow_html=True)
-
-# Statistics panel with custom HTML metrics
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    st.markdown(f"""
-    <div style="background-color: white; border: 1px solid #ddd; padding: 1rem; border-radius: 0.5rem; text-align: center;">
-        <div style="color: #666; font-size: 14px; margin-bottom: 0.5rem;">Aeroportos Filtrados</div>
-        <div style="color: black; font-size: 24px; font-weight: 600;">{len(filtered_airports)}</div>
-    </div>
+        colors = '#1f77b4'  # Light blue instead of 'blue'
+        colorbar_title = None
+
+    # Calculate marker sizes based on connections (degree)
+    degrees = filtered_airports['Degree'].tolist()
+    marker_sizes = []
+    for deg in degrees:
+        if deg <= 10:
+            size = max(3, 3 + deg * 0.75)  # Linear scaling for low degrees (3-10)
+        else:
+            size = max(10, min(25, 10 + (deg - 10) * 0.25))  # Reduced scaling for high degrees (10-25)
+        marker_sizes.append(size)
+
+    fig.add_trace(go.Scattergeo(
+        lon=filtered_airports['Longitude'],
+        lat=filtered_airports['Latitude'],
+        text=filtered_airports['Name'] + '<br>Conexões: ' + filtered_airports['Degree'].astype(str),
+        mode='markers+text' if show_labels else 'markers',
+        textfont=dict(size=8, color='#000000'),
+        textposition="top center",
+        marker=dict(
+            size=marker_sizes,
+            color=colors,
+            colorscale='Blues' if color_by_degree else None,
+            colorbar=dict(
+                title=dict(text=colorbar_title, font=dict(color='#000000')),
+                tickfont=dict(color='#000000')
+            ) if color_by_degree else None,
+            showscale=color_by_degree,
+            line=dict(width=2, color='#000000')
+        ),
+        name='Aeroportos',
+        hovertemplate='<b>%{text}</b><extra></extra>'
+    ))
+
+    # Add routes if enabled
+    if show_routes:
+        filtered_routes = degree_index.routes(min_connections)
+
+        fig.add_trace(camadas.route_layer(
+            airports_br, filtered_routes,
+            line=dict(width=1.2, color=f'rgba(0,0,0,{route_opacity})')
+        ))
+
+    # Enhanced layout
+    fig.update_layout(
+        title={
+            'text': f'Rede Aérea ({view.name}) - {len(filtered_airports)} Aeroportos',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'color': '#000000', 'size': 20}
+        },
+        geo=dict(
+            **view.geo_view,
+            projection_type='natural earth',
+            showland=True,
+            landcolor='rgb(240, 240, 240)',
+            coastlinecolor='rgb(0, 0, 0)',
+            showocean=True,
+            oceancolor='rgb(255, 255, 255)',
+            showcountries=True,
+            countrycolor='rgb(0, 0, 0)',
+            projection_scale=1.2
+        ),
+        height=700,
+        showlegend=True,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(color='#000000')
+    )
+    return fig
+
+
+def render(view):
+    airports_br = view.airports
+    routes_br = view.routes
+
+    st.markdown("## Mapa Rotas Aéreas")
+
+    # Interactive controls
+    col1, col2, col3 = st.columns([1, 1, 1])
+
+    with col1:
+        show_routes = st.checkbox("Mostrar Rotas", value=True)
+        route_opacity = st.slider("Opacidade das Rotas", 0.1, 1.0, 0.1, 0.1)
+
+    with col2:
+        min_connections = st.slider("Mín. Conexões por Aeroporto", 0, 80, 1)
+
+    with col3:
+        color_by_degree = st.checkbox("Colorir por Grau de Conectividade", value=True)
+        show_labels = st.checkbox("Mostrar Labels", value=False)
+
+    # Filter airports by minimum connections: a prefix of the degree-sorted index
+    degree_index = view.graph.degree_index
+    filtered_airports = degree_index.airports(min_connections)
+    medicao.count("mapa_rotas.airports", len(filtered_airports))
+
+    # The figure only depends on the region and the controls: a configuration shown
+    # before (in any session) is reused instead of rebuilt
+    fig = armazem.figure(
+        ('mapa_rotas', view.key, view.graph.fingerprint, min_connections,
+         show_routes, route_opacity, color_by_degree, show_labels),
+        lambda: build_figure(view, min_connections, show_routes, route_opacity, color_by_degree, show_labels)
+    )
+
+    with medicao.stage("mapa_rotas.map"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Add custom CSS to fix metric font colors
+    st.markdown("""
+    <style>
+    /* Force all metric text to be black */
+    [data-testid="metric-container"] {
+        background-color: white !important;
+        border: 1px solid #ddd !important;
+        padding: 1rem !important;
+        border-radius: 0.5rem !important;
+    }
+
+    [data-testid="metric-container"] * {
+        color: black !important;
+    }
+
+    [data-testid="metric-container"] label {
+        color: #666 !important;
+        font-size: 14px !important;
+    }
+
+    [data-testid="metric-container"] div[data-testid="metric-value"] {
+        color: black !important;
+        font-size: 24px !important;
+        font-weight: 600 !important;
+    }
+
+    /* Alternative selectors for metric values */
+    .metric-container .metric-value {
+        color: black !important;
+    }
+
+    div[class*="metric"] {
+        color: black !important;
+    }
+    </style>
     """, unsafe_allow_html=True)
 
-with col2:
-    st.markdown(f"""
-    <div style="background-color: white; border: 1px solid #ddd; padding: 1rem; border-radius: 0.5rem; text-align: center;">
-        <div style="color: #666; font-size: 14px; margin-bottom: 0.5rem;">Total de Rotas</div>
-        <div style="color: black; font-size: 24px; font-weight: 600;">{len(routes_br)}</div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Statistics panel with custom HTML metrics
+    col1, col2, col3, col4 = st.columns(4)
 
-with col3:
-    if not filtered_airports.empty:
-        avg_degree = np.mean([degree_mapping.get(aid, 0) for aid in filtered_airports['Airport ID']])
+    with col1:
         st.markdown(f"""
         <div style="background-color: white; border: 1px solid #ddd; padding: 1rem; border-radius: 0.5rem; text-align: center;">
-            <div style="color: #666; font-size: 14px; margin-bottom: 0.5rem;">Conectividade Média</div>
-            <div style="color: black; font-size: 24px; font-weight: 600;">{avg_degree:.1f}</div>
+            <div style="color: #666; font-size: 14px; margin-bottom: 0.5rem;">Aeroportos Filtrados</div>
+            <div style="color: black; font-size: 24px; font-weight: 600;">{len(filtered_airports)}</div>
         </div>
         """, unsafe_allow_html=True)
 
-with col4:
-    if degree_mapping:
-        max_connections = max(degree_mapping.values())
-        busiest = [name for aid, name in zip(airports_br['Airport ID'], airports_br['Name']) 
-                  if degree_mapping.get(aid, 0) == max_connections]
-        busiest_name = busiest[0] if busiest else "N/A"
+    with col2:
         st.markdown(f"""
         <div style="background-color: white; border: 1px solid #ddd; padding: 1rem; border-radius: 0.5rem; text-align: center;">
-            <div style="color: #666; font-size: 14px; margin-bottom: 0.5rem;">Mais Conectado</div>
-            <div style="color: black; font-size: 24px; font-weight: 600;">{busiest_name}</div>
+            <div style="color: #666; font-size: 14px; margin-bottom: 0.5rem;">Total de Rotas</div>
+            <div style="color: black; font-size: 24px; font-weight: 600;">{len(routes_br)}</div>
         </div>
         """, unsafe_allow_html=True)
+
+    with col3:
+        if not filtered_airports.empty:
+            avg_degree = filtered_airports['Degree'].mean()
+            st.markdown(f"""
+            <div style="background-color: white; border: 1px solid #ddd; padding: 1rem; border-radius: 0.5rem; text-align: center;">
+                <div style="color: #666; font-size: 14px; margin-bottom: 0.5rem;">Conectividade Média</div>
+                <div style="color: black; font-size: 24px; font-weight: 600;">{avg_degree:.1f}</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+    with col4:
+        if len(degree_index.node_order):
+            # First airport of the index: highest degree, earliest in the table on ties
+            busiest_name = airports_br['Name'].iloc[degree_index.node_order[0]]
+            st.markdown(f"""
+            <div style="background-color: white; border: 1px solid #ddd; padding: 1rem; border-radius: 0.5rem; text-align: center;">
+                <div style="color: #666; font-size: 14px; margin-bottom: 0.5rem;">Mais Conectado</div>
+                <div style="color: black; font-size: 24px; font-weight: 600;">{busiest_name}</div>
+            </div>
+            """, unsafe_allow_html=True)
@@ -0,0 +1,123 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from dados import CACHE_DIR
+
+# MEDICAO=1 instruments every rerun; MEDICAO_LOG changes where runs are appended
+ENV_ENABLED = "MEDICAO"
+ENV_LOG = "MEDICAO_LOG"
+LOG_PATH = os.path.join(CACHE_DIR, "medicao.jsonl")
+
+_local = threading.local()
+_log_lock = threading.Lock()
+_disabled = nullcontext()
+
+
+def enabled_by_env():
+    return os.environ.get(ENV_ENABLED, "") not in ("", "0")
+
+
+# Timings and counters of one script run (one rerun of one session)
+class Run:
+    def __init__(self, context):
+        self.context = context
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stages = []
+        self.counters = {}
+        self.depth = 0
+        self.total = None
+
+    def to_dict(self):
+        return {
+            'time': self.started,
+            **self.context,
+            'total': self.total,
+            'stages': [{'name': name, 'seconds': seconds, 'depth': depth} for name, seconds, depth in self.stages],
+            'counters': self.counters,
+        }
+
+
+class _Stage:
+    __slots__ = ('run', 'name', 'index', 'start')
+
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        run = self.run
+        # Reserve the slot now so nested stages are listed after their parent
+        self.index = len(run.stages)
+        run.stages.append((self.name, None, run.depth))
+        run.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        run = self.run
+        run.depth -= 1
+        run.stages[self.index] = (self.name, time.perf_counter() - self.start, run.depth)
+        return False
+
+
+def current():
+    return getattr(_local, 'run', None)
+
+
+# Starts instrumenting the calling thread; context (session, page...) goes into the log
+def start_run(**context):
+    _local.run = Run(context)
+    return _local.run
+
+
+# Stops instrumenting the thread and appends the run to the JSON-lines log
+def finish_run(log_path=None):
+    run = current()
+    if run is None:
+        return None
+    _local.run = None
+    run.total = time.perf_counter() - run.start
+    path = log_path or os.environ.get(ENV_LOG) or LOG_PATH
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        line = json.dumps(run.to_dict(), default=str)
+        with _log_lock, open(path, "a") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass
+    return run
+
+
+# Context manager timing a named stage; a shared no-op when the thread is not instrumented
+def stage(name):
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return _disabled
+    return _Stage(run, name)
+
+
+# Decorator form of stage(); the name defaults to module.function
+def timed(name=None):
+    def decorate(function):
+        label = name or f"{function.__module__}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            run = getattr(_local, 'run', None)
+            if run is None:
+                return function(*args, **kwargs)
+            with _Stage(run, label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run.counters[name] = run.counters.get(name, 0) + n
@@ -0,0 +1,57 @@
+import hashlib
+
+import networkx as nx
+import numpy as np
+
+import esparsa
+import intermediacao
+import medicao
+import resultados
+
+# Bump when the way a centrality is computed changes, so stored results are not reused
+CENTRALITY_VERSION = 4
+
+
+# Measures that count hops: the same for every edge weight
+def _hop_centralities(graph, workers):
+    return {
+        'degree': nx.degree_centrality(graph.G),
+        'betweenness': intermediacao.betweenness_centrality(graph, workers),  # Exact, spread over processes
+        'closeness': esparsa.closeness_centrality(graph, workers),
+    }
+
+
+def _spectral_centralities(graph, weight):
+    return {
+        'eigenvector': esparsa.eigenvector_centrality(graph, max_iter=1000, weight=weight),
+        'pagerank': esparsa.pagerank(graph, weight=weight),
+        'katz': esparsa.katz_centrality(graph, weight=weight),
+    }
+
+
+# The fingerprint only covers which airport pairs are linked; the weights (airline, route
+# and equipment counts per pair) can change without it, so weighted results are keyed by
+# the weight column as well
+def _weight_hash(graph, weight):
+    values = np.ascontiguousarray(graph.edge_table[weight].to_numpy(dtype=float))
+    return hashlib.sha1(values.tobytes()).hexdigest()[:16]
+
+
+# Degree, betweenness, closeness, eigenvector, PageRank and Katz centrality of a RouteGraph, as
+# {metric: {airport_id: value}}; computed once per graph fingerprint. With `weight` (a column
+# of graph.edge_table, e.g. 'airlines') the eigenvector, PageRank and Katz iterations weigh
+# each airport pair by it; degree, betweenness and closeness count hops, so they are stored
+# once per graph and only the three spectral measures are computed again per weight.
+@medicao.timed()
+def centralities(graph, workers=None, weight=None):
+    hops = resultados.cached(
+        f"centralidade-v{CENTRALITY_VERSION}",
+        graph.fingerprint,
+        lambda: _hop_centralities(graph, workers),
+    )
+    spectral = resultados.cached(
+        f"centralidade-espectral-v{CENTRALITY_VERSION}",
+        graph.fingerprint if weight is None else f"{graph.fingerprint}-{weight}-{_weight_hash(graph, weight)}",
+        lambda: _spectral_centralities(graph, weight),
+    )
+    return {**hops, **spectral}
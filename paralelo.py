@@ -0,0 +1,29 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Below this many nodes the pool start-up costs more than it saves
+MIN_PARALLEL_NODES = 500
+
+_shared = None
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def _run_task(function_task):
+    function, task = function_task
+    return function(*_shared, task)
+
+
+# [function(*shared, task) for task in tasks], in task order. With more than one worker
+# and `parallel` true the tasks go to a process pool whose workers receive `shared` (the
+# read-only arrays every task needs) once at start-up; `function` must be a module-level
+# function so it can be sent to them.
+def map_tasks(function, shared, tasks, workers=None, parallel=True):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or not parallel:
+        return [function(*shared, task) for task in tasks]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(tuple(shared),)) as pool:
+        return list(pool.map(_run_task, [(function, task) for task in tasks]))
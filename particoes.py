@@ -0,0 +1,102 @@
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import community as community_louvain
+
+import medicao
+import resultados
+
+# Bump when the way partitions are computed changes, so stored results are not reused
+LOUVAIN_VERSION = 1
+# Values offered by the "Mínimo de Conexões" slider
+MIN_CONNECTIONS = range(0, 21)
+SEED = 0
+# Precompute jobs remembered (so a rerun does not queue the same graph again); the oldest
+# finished ones are forgotten past this
+MAX_PRECOMPUTED = 32
+
+# Per-key [lock, number of callers using it]; an entry is dropped when its last caller leaves
+_key_locks = {}
+_precompute = OrderedDict()
+_lock = threading.Lock()
+# Jobs for the single background worker: graphs queue up instead of each starting its own
+# thread. A daemon thread, so a pending precompute never holds up shutdown.
+_jobs = queue.Queue()
+_worker = None
+
+
+# Louvain runs on the undirected networkx graph of the airports with at least
+# min_connections (in + out) routes; it is only built here, once per stored partition
+def _louvain(graph, min_connections, seed):
+    G_undirected = graph.G.subgraph(graph.degree_index.node_ids(min_connections).tolist()).to_undirected()
+    if not G_undirected.number_of_edges():
+        # Louvain needs at least one route: every airport is its own community
+        return {'partition': {node: i for i, node in enumerate(G_undirected)}, 'modularity': 0.0}
+    partition = community_louvain.best_partition(G_undirected, random_state=seed)
+    return {
+        'partition': partition,
+        'modularity': community_louvain.modularity(partition, G_undirected),
+    }
+
+
+# Louvain communities of the filtered graph as {'partition': {airport_id: community},
+# 'modularity': float}. Seeded, and stored per (graph fingerprint, min_connections, seed),
+# so a value is computed once and the communities keep their labels across reruns.
+@medicao.timed()
+def partition(graph, min_connections, seed=SEED):
+    key = f"{graph.fingerprint}-{min_connections}-{seed}"
+    with _lock:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        # A value being precomputed in the background is waited for, not computed twice
+        with entry[0]:
+            return resultados.cached(
+                f"louvain-v{LOUVAIN_VERSION}",
+                key,
+                lambda: _louvain(graph, min_connections, seed),
+            )
+    finally:
+        with _lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+
+def _work():
+    while True:
+        job, graph, seed, values = _jobs.get()
+        if not job.set_running_or_notify_cancel():
+            continue
+        try:
+            for min_connections in values:
+                partition(graph, min_connections, seed)
+        except Exception as error:
+            job.set_exception(error)
+        else:
+            job.set_result(None)
+
+
+# Fills the store for every slider value on the background worker (one job per graph and
+# seed), so moving the slider afterwards only reads stored partitions. Returns the job's
+# Future.
+def precompute(graph, seed=SEED, values=MIN_CONNECTIONS):
+    global _worker
+    key = (graph.fingerprint, seed)
+    with _lock:
+        job = _precompute.get(key)
+        if job is None:
+            if _worker is None:
+                _worker = threading.Thread(target=_work, name="louvain", daemon=True)
+                _worker.start()
+            job = Future()
+            _jobs.put((job, graph, seed, values))
+            _precompute[key] = job
+            finished = [k for k, f in _precompute.items() if f.done()]
+            for k in finished[:max(0, len(_precompute) - MAX_PRECOMPUTED)]:
+                del _precompute[k]
+        else:
+            _precompute.move_to_end(key)
+    return job
@@ -0,0 +1,138 @@
+import heapq
+
+import numpy as np
+
+import intermediacao
+import medicao
+import paralelo
+import resultados
+
+# Random-failure trials handed to a worker at a time
+TRIALS_PER_TASK = 25
+
+
+# Undirected neighbour lists (no self loops) of a RouteGraph, as plain lists for speed
+def undirected_neighbors(graph):
+    keep = graph.src != graph.dst
+    u = np.concatenate([graph.src[keep], graph.dst[keep]])
+    v = np.concatenate([graph.dst[keep], graph.src[keep]])
+    order = np.lexsort((v, u))
+    u, v = u[order], v[order]
+    unique = np.concatenate(([True], (u[1:] != u[:-1]) | (v[1:] != v[:-1]))) if len(u) else np.zeros(0, bool)
+    u, v = u[unique], v[unique]
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(u, minlength=len(graph)))))
+    v = v.tolist()
+    return [v[bounds[i]:bounds[i + 1]] for i in range(len(graph))]
+
+
+# Largest component size after removing the first k nodes of `order`, for k = 0..n.
+# Newman-Ziff: nodes are added back in reverse order into a union-find, so the whole
+# curve costs one pass over the edges.
+def largest_component_curve(neighbors, order):
+    n = len(neighbors)
+    parent = list(range(n))
+    size = [1] * n
+    present = [False] * n
+    largest = 0
+    added = [0] * (n + 1)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for j, v in enumerate(reversed(order), start=1):
+        present[v] = True
+        root = v
+        for u in neighbors[v]:
+            if not present[u]:
+                continue
+            ru = find(u)
+            if ru == root:
+                continue
+            if size[ru] > size[root]:
+                ru, root = root, ru
+            parent[ru] = root
+            size[root] += size[ru]
+        largest = max(largest, size[root])
+        added[j] = largest
+    return np.array(added[::-1], dtype=float)
+
+
+# Removal order that always takes the node with the highest remaining degree
+def adaptive_degree_order(neighbors):
+    n = len(neighbors)
+    degree = [len(nbrs) for nbrs in neighbors]
+    heap = [(-d, v) for v, d in enumerate(degree)]
+    heapq.heapify(heap)
+    removed = [False] * n
+    order = []
+    while heap:
+        d, v = heapq.heappop(heap)
+        if removed[v] or -d != degree[v]:
+            continue  # stale entry
+        removed[v] = True
+        order.append(v)
+        for u in neighbors[v]:
+            if not removed[u]:
+                degree[u] -= 1
+                heapq.heappush(heap, (-degree[u], u))
+    return order
+
+
+def _random_trials(neighbors, seeds):
+    n = len(neighbors)
+    return [largest_component_curve(neighbors, np.random.default_rng(seed).permutation(n).tolist())
+            for seed in seeds]
+
+
+def _random_curves(neighbors, trials, seed, workers):
+    seeds = np.random.SeedSequence(seed).spawn(trials)
+    tasks = [seeds[i:i + TRIALS_PER_TASK] for i in range(0, trials, TRIALS_PER_TASK)]
+    results = paralelo.map_tasks(
+        _random_trials, (neighbors,), tasks, workers,
+        parallel=len(neighbors) >= paralelo.MIN_PARALLEL_NODES,
+    )
+    return np.array([curve for chunk in results for curve in chunk])
+
+
+def _simulate(graph, trials, seed, workers):
+    n = len(graph)
+    neighbors = undirected_neighbors(graph)
+    fraction = np.arange(n + 1) / n if n else np.zeros(1)
+    scale = n or 1
+
+    runs = _random_curves(neighbors, trials, seed, workers) / scale
+    curves = {
+        'random': {
+            'fraction': fraction,
+            'mean': runs.mean(axis=0),
+            'low': np.percentile(runs, 2.5, axis=0),
+            'high': np.percentile(runs, 97.5, axis=0),
+        }
+    }
+
+    degree = np.array([len(nbrs) for nbrs in neighbors])
+    betweenness = intermediacao.betweenness(graph.indptr, graph.indices, workers)
+    orders = {
+        'degree': np.argsort(-degree, kind='stable'),
+        'adaptive_degree': adaptive_degree_order(neighbors),
+        'betweenness': np.argsort(-betweenness, kind='stable'),
+    }
+    for name, order in orders.items():
+        curve = largest_component_curve(neighbors, np.asarray(order).tolist()) / scale
+        curves[name] = {'fraction': fraction, 'mean': curve, 'low': curve, 'high': curve}
+    return curves
+
+
+# Largest-component fraction against the fraction of nodes removed, for random failure
+# (mean and 95% band over `trials` runs), static and adaptive degree attacks and a
+# static betweenness attack. Stored per graph fingerprint and parameters.
+@medicao.timed()
+def robustness_curves(graph, trials=200, seed=0, workers=None):
+    return resultados.cached(
+        "percolacao-v1",
+        f"{graph.fingerprint}-{trials}-{seed}",
+        lambda: _simulate(graph, trials, seed, workers),
+    )
@@ -0,0 +1,32 @@
+import numpy as np
+
+DEFAULT_COUNTRIES = ("Brazil",)
+
+# Original framing of the Brazilian maps; other regions are fitted to their airports
+_BRAZIL_GEO = dict(scope='south america', center=dict(lat=-15, lon=-55))
+
+
+# Canonical cache key for a selection: sorted country names, empty tuple for the whole world
+def region_key(countries):
+    return tuple(sorted(set(countries)))
+
+
+def region_name(key):
+    if not key:
+        return "Mundo"
+    if key == DEFAULT_COUNTRIES:
+        return "Brasil"
+    return ", ".join(key)
+
+
+def node_mask(airports, key):
+    if not key:
+        return np.ones(len(airports), dtype=bool)
+    return airports['Country'].isin(key).to_numpy()
+
+
+# scope/center/fitbounds entries for the geo layout of the map pages
+def geo_view(key):
+    if key == DEFAULT_COUNTRIES:
+        return dict(_BRAZIL_GEO)
+    return dict(scope='world', fitbounds='locations')
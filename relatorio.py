@@ -0,0 +1,151 @@
+"""Headless batch analytics: degree, centrality, communities and robustness per country.
+
+Loads the data and builds the graphs through the same shared store as app.py, runs
+the analyses of each country in a worker pool and writes one table per analysis
+(with a `country` column) to the output directory:
+
+    python relatorio.py                                # every country
+    python relatorio.py Brazil Chile --output relatorios --format parquet
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import armazem
+import estatisticas
+import metricas
+import particoes
+import percolacao
+import regioes
+
+CENTRALITIES = ['degree', 'betweenness', 'closeness', 'eigenvector', 'pagerank', 'katz']
+
+_options = None
+
+
+def _airport_table(view, centrality, partition):
+    graph = view.graph
+    out_degree = np.diff(graph.indptr)
+    in_degree = np.bincount(graph.dst, minlength=len(graph))
+    table = graph.node_table(graph.node_ids, ['IATA', 'Name', 'City'])
+    table['in_degree'] = in_degree
+    table['out_degree'] = out_degree
+    table['degree'] = in_degree + out_degree
+    for name in CENTRALITIES:
+        table[f'{name}_centrality'] = table['Airport_ID'].map(centrality[name])
+    table['community'] = table['Airport_ID'].map(partition).astype('Int64')
+    return table
+
+
+def _robustness_table(curves):
+    return pd.concat([
+        pd.DataFrame({'strategy': strategy, **curve})
+        for strategy, curve in curves.items()
+    ], ignore_index=True)
+
+
+# Every analysis of one country, as {table name: DataFrame}
+def analyze(country, min_connections=1, trials=200, seed=particoes.SEED, workers=1):
+    view = armazem.region(regioes.region_key([country]))
+    graph = view.graph
+
+    centrality = metricas.centralities(graph, workers)
+    louvain = particoes.partition(graph, min_connections, seed)
+    partition = louvain['partition']
+    keep = np.zeros(len(graph), dtype=bool)
+    keep[graph.positions(list(partition))] = True
+    communities, _ = estatisticas.community_statistics(
+        *estatisticas.undirected_edges(graph, keep), estatisticas.label_array(graph, partition)
+    )
+    curves = percolacao.robustness_curves(graph, trials, seed, workers)
+
+    summary = {
+        'airports': len(graph),
+        'routes': len(view.routes),
+        'edges': len(graph.src),
+        'communities': len(communities),
+        'modularity': louvain['modularity'],
+    }
+    for strategy, curve in curves.items():
+        # Robustness index: mean largest-component fraction over all removal steps
+        summary[f'robustness_{strategy}'] = float(curve['mean'][1:].mean()) if len(curve['mean']) > 1 else 0.0
+
+    tables = {
+        'aeroportos': _airport_table(view, centrality, partition),
+        'comunidades': communities,
+        'robustez': _robustness_table(curves),
+        'resumo': pd.DataFrame([summary]),
+    }
+    for table in tables.values():
+        table.insert(0, 'country', country)
+    return tables
+
+
+def _init_worker(options):
+    global _options
+    _options = options
+
+
+def _run(country):
+    return country, analyze(country, **_options)
+
+
+def _write(tables, output, fmt):
+    os.makedirs(output, exist_ok=True)
+    for name, table in tables.items():
+        path = os.path.join(output, f"{name}.{fmt}")
+        if fmt == "parquet":
+            table.to_parquet(path, index=False)
+        else:
+            table.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("countries", nargs="*", help="countries to analyze (default: every country)")
+    parser.add_argument("--output", default="relatorios")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-connections", type=int, default=1, help="community detection filter")
+    parser.add_argument("--trials", type=int, default=200, help="random-failure runs per country")
+    parser.add_argument("--seed", type=int, default=particoes.SEED)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    data = armazem.dataset()
+    countries = args.countries or data.countries
+    unknown = sorted(set(countries) - set(data.countries))
+    if unknown:
+        parser.error(f"unknown countries: {', '.join(unknown)}")
+
+    # One country per task; each country runs its analyses single-threaded
+    options = dict(min_connections=args.min_connections, trials=args.trials, seed=args.seed, workers=1)
+    results = {}
+    if args.workers == 1 or len(countries) == 1:
+        _init_worker(options)
+        tasks = (_run(country) for country in countries)
+        for country, tables in tasks:
+            results[country] = tables
+            print(f"[{len(results)}/{len(countries)}] {country}", file=sys.stderr)
+    else:
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(options,)) as pool:
+            for future in as_completed([pool.submit(_run, country) for country in countries]):
+                country, tables = future.result()
+                results[country] = tables
+                print(f"[{len(results)}/{len(countries)}] {country}", file=sys.stderr)
+
+    tables = {
+        name: pd.concat([results[country][name] for country in countries], ignore_index=True)
+        for name in results[countries[0]]
+    }
+    _write(tables, args.output, args.format)
+    print(f"{len(countries)} países em {time.perf_counter() - start:.1f} s -> {args.output}/", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import medicao
+from dados import CACHE_DIR
+
+# Results kept in memory; the least recently used are dropped past this (they stay on disk)
+MAX_RESULTS = 64
+
+# Results live in this process (shared by every session) and in .cache/resultados/<kind>/
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def _path(kind, key, base_dir):
+    return os.path.join(base_dir, CACHE_DIR, "resultados", kind, f"{key}.pkl")
+
+
+def _load(path):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def _save(path, value):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Read-only checkout: the result still stays in memory
+        pass
+
+
+def _remember(kind, key, value):
+    with _lock:
+        _memory[(kind, key)] = value
+        _memory.move_to_end((kind, key))
+        while len(_memory) > MAX_RESULTS:
+            _memory.popitem(last=False)
+
+
+def get(kind, key, base_dir="."):
+    with _lock:
+        if (kind, key) in _memory:
+            _memory.move_to_end((kind, key))
+            return _memory[(kind, key)]
+    value = _load(_path(kind, key, base_dir))
+    if value is not None:
+        _remember(kind, key, value)
+    return value
+
+
+def put(kind, key, value, base_dir="."):
+    _remember(kind, key, value)
+    _save(_path(kind, key, base_dir), value)
+
+
+# Drops the in-memory results (the disk store is kept), e.g. when the dataset is reloaded
+def clear():
+    with _lock:
+        _memory.clear()
+
+
+# Returns the stored result for (kind, key), running compute() only when neither the
+# memory nor the disk store has it
+def cached(kind, key, compute, base_dir="."):
+    value = get(kind, key, base_dir)
+    if value is None:
+        medicao.count(f"{kind}.computed")
+        value = compute()
+        put(kind, key, value, base_dir)
+    else:
+        medicao.count(f"{kind}.stored")
+    return value
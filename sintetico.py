@@ -0,0 +1,141 @@
+"""Synthetic airports.dat/routes.dat of any size, shaped like the real network.
+
+    python sintetico.py saida/ --scale 10 --seed 0
+    python sintetico.py saida/ --airports 200000 --routes 5000000
+
+Airports are drawn from the real ones (name, country, coordinates with a small
+jitter). Routes follow a degree-corrected configuration model over the real routes:
+the source is drawn in proportion to the out-degree of the real airport it copies,
+one of that airport's real routes is taken as a template, and the destination is a
+random copy of the template's destination (an airport of the same country when the
+destination got no copy). Expected in- and out-degrees match the real airports at
+the same density, so the degree distribution, the hubs, the geographic spread and
+the route lengths follow the real network; airline and equipment come with the
+template.
+
+Routes are produced and written in chunks; memory grows with the number of airports,
+not of routes.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import dados
+
+CHUNK_SIZE = 200_000
+# Standard deviation, in degrees, of the jitter added to copied coordinates
+JITTER_DEGREES = 0.3
+
+
+def _real_network(base_dir):
+    airports, routes = dados.load_tables(base_dir)
+    index = pd.Index(airports['Airport ID'])
+    src = index.get_indexer(routes['Source airport ID'])
+    dst = index.get_indexer(routes['Destination airport ID'])
+    known = (src >= 0) & (dst >= 0)
+    routes = routes[known].reset_index(drop=True)
+    src, dst = src[known], dst[known]
+    out_degree = np.bincount(src, minlength=len(airports))
+    in_degree = np.bincount(dst, minlength=len(airports))
+    return airports, routes, src, dst, out_degree, in_degree
+
+
+def _write_airports(path, real, copies, rng):
+    with open(path, "w") as f:
+        for start in range(0, len(copies), CHUNK_SIZE):
+            part = real.iloc[copies[start:start + CHUNK_SIZE]].copy()
+            ids = np.arange(start, start + len(part)) + 1
+            part['Airport ID'] = ids
+            part['Name'] = part['Name'].astype(str) + " #" + pd.Series(ids, index=part.index).astype(str)
+            part['Latitude'] = (part['Latitude'] + rng.normal(0, JITTER_DEGREES, len(part))).clip(-90, 90)
+            part['Longitude'] = (part['Longitude'] + rng.normal(0, JITTER_DEGREES, len(part)) + 180) % 360 - 180
+            part.to_csv(f, header=False, index=False, na_rep="\\N")
+
+
+# Positions of the items of `groups` (ints in [0, count)) grouped by value: members of
+# group g are order[start[g]:start[g + 1]]
+def _group(groups, count):
+    order = np.argsort(groups, kind='stable')
+    return order, np.searchsorted(groups[order], np.arange(count + 1))
+
+
+# Writes airports.dat and routes.dat with `airports` airports and `routes` routes to
+# `output_dir`; without explicit sizes, `scale` times the real network
+def generate(output_dir, airports=None, routes=None, scale=1.0, seed=0, base_dir="."):
+    real_airports, real_routes, real_src, real_dst, out_degree, in_degree = _real_network(base_dir)
+    n = int(airports or round(len(real_airports) * scale))
+    total_routes = int(routes or round(len(real_routes) * scale))
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Each synthetic airport copies a real one; every real airport gets floor or ceil of
+    # n / len(real) copies, so above the real size no destination is left without one
+    copies = rng.permutation(np.resize(rng.permutation(len(real_airports)), n))
+    _write_airports(os.path.join(output_dir, dados.AIRPORTS_FILE), real_airports, copies, rng)
+
+    route_order, route_start = _group(real_src, len(real_airports))
+    copy_order, copy_start = _group(copies, len(real_airports))
+    copy_count = np.diff(copy_start)
+    # Destinations whose real airport got no copy go to an airport of the same country
+    country_codes, country_names = pd.factorize(real_airports['Country'].fillna(''))
+    country = country_codes[copies]
+    country_order, country_start = _group(country, len(country_names))
+    country_count = np.diff(country_start)
+
+    source_cumulative = np.cumsum(out_degree[copies].astype(float))
+    id_text = pd.Series(np.arange(1, n + 1)).astype(str).to_numpy()
+    iata = real_airports['IATA'].fillna("\\N").to_numpy()[copies]
+
+    with open(os.path.join(output_dir, dados.ROUTES_FILE), "w") as f:
+        written = 0
+        while written < total_routes:
+            size = min(CHUNK_SIZE, total_routes - written)
+            # Source in proportion to out-degree, then one of the real routes of the
+            # airport it copies as the template of the new route
+            src = np.searchsorted(source_cumulative, rng.random(size) * source_cumulative[-1], side='right')
+            real = copies[src]
+            row = route_order[route_start[real] + (rng.random(size) * out_degree[real]).astype(np.int64)]
+            target = real_dst[row]
+
+            # Destination: a copy of the template's destination, so in-degrees, hubs and
+            # route lengths follow the real network
+            count = copy_count[target]
+            dst = copy_order[copy_start[target] + (rng.random(size) * count).astype(np.int64)]
+            fallback = count == 0
+            target_country = country_codes[target[fallback]]
+            in_country = country_count[target_country]
+            pick = country_order[np.minimum(
+                country_start[target_country] + (rng.random(fallback.sum()) * in_country).astype(np.int64),
+                n - 1
+            )]
+            dst[fallback] = np.where(in_country > 0, pick, rng.integers(0, n, fallback.sum()))
+
+            # Airline, codeshare, stops and equipment of the template route
+            template = real_routes.iloc[row].reset_index(drop=True)
+            template['Source airport'] = iata[src]
+            template['Source airport ID'] = id_text[src]
+            template['Destination airport'] = iata[dst]
+            template['Destination airport ID'] = id_text[dst]
+            loops = src == dst
+            template[~loops].to_csv(f, header=False, index=False, na_rep="\\N")
+            written += int((~loops).sum())
+    return n, total_routes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="directory for airports.dat and routes.dat")
+    parser.add_argument("--scale", type=float, default=1.0, help="size relative to the real network")
+    parser.add_argument("--airports", type=int, help="number of airports (overrides --scale)")
+    parser.add_argument("--routes", type=int, help="number of routes (overrides --scale)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    n, total_routes = generate(args.output, args.airports, args.routes, args.scale, args.seed)
+    print(f"{n} aeroportos, {total_routes} rotas -> {args.output}/", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()